@@ -0,0 +1,111 @@
+"""
+Bot that thinks in a separate process so a deep search never holds up a frame. The
+game posts a snapshot (board, current piece, preview) whenever a piece spawns; the
+worker runs an iterative-deepening search over the preview and sends back the best
+placement after every completed depth. The game only polls a queue each update and
+plays whatever it has once the search is done or the piece would start to fall.
+
+The process plumbing is src.background's: posting a new snapshot makes the worker
+drop a search for a piece that has already been placed (or taken back) at the next
+candidate, instead of finishing stale work.
+"""
+from __future__ import annotations
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from .background import BackgroundWorker
+from .board import Board
+from .bot import Weights, evaluate
+from .config import COLORS
+from .movegen import Placement, placements, spawn
+from .piece import Piece
+
+
+class _Stop(Exception):
+    pass
+
+
+class _Search:
+    def __init__(self, weights: Weights, should_stop):
+        self.weights = weights
+        self.should_stop = should_stop
+
+    def _value(self, board: Board, preview: Sequence[str], cleared: int) -> float:
+        """Best leaf score reachable by placing every preview piece in turn."""
+        if not preview:
+            return evaluate(board, cleared, self.weights)
+        if self.should_stop():
+            raise _Stop
+        kind = preview[0]
+        best = None
+        for placement in placements(board, spawn(kind, board.cols), with_moves=False):
+            child = board.copy()
+            lines = child.lock(placement.piece(COLORS[kind]))
+            value = self._value(child, preview[1:], cleared + lines)
+            if best is None or value > best:
+                best = value
+        # Topping out on a preview piece is as bad as it gets
+        return best if best is not None else float("-inf")
+
+    def best(self, board: Board, piece: Piece, preview: Sequence[str], order: List[Placement]) -> List[Placement]:
+        """Root candidates sorted best first, looking `len(preview)` pieces ahead."""
+        scored = []
+        for placement in order:
+            if self.should_stop():
+                raise _Stop
+            child = board.copy()
+            cleared = child.lock(placement.piece(piece.color))
+            scored.append((self._value(child, preview, cleared), placement))
+        scored.sort(key=lambda item: -item[0])
+        return [placement for _, placement in scored]
+
+
+class _Think:
+    """Worker side: iterative deepening over the preview, replying after every completed depth."""
+
+    def __init__(self, weights: Weights, depth: int):
+        self.weights = weights
+        self.depth = depth
+
+    def __call__(self, payload, should_stop, reply):
+        board, piece, preview, budget = payload
+        deadline = time.perf_counter() + budget
+        search = _Search(self.weights, lambda: should_stop() or time.perf_counter() > deadline)
+        order = list(placements(board, piece))
+        if not order:
+            reply((None, True))
+            return
+        lookahead = min(self.depth - 1, len(preview))
+        for ahead in range(lookahead + 1):
+            try:
+                # The previous depth's ranking orders this one, so the best-looking
+                # candidates are searched first.
+                order = search.best(board, piece, preview[:ahead], order)
+            except _Stop:
+                break
+            reply((order[0], ahead == lookahead))
+
+
+class AsyncBot(BackgroundWorker):
+    """Game-side handle: post snapshots with `think`, collect answers with `poll`."""
+
+    def __init__(self, weights: Weights = Weights(), depth: int = 2):
+        super().__init__(_Think(weights, depth))
+        self.best: Optional[Placement] = None
+        self.done = False
+
+    def think(self, board: Board, piece: Piece, preview: Sequence[str], budget_s: float):
+        """Start searching for `piece`; any search still running for an earlier piece stops."""
+        self.best, self.done = None, False
+        snapshot = Piece(piece.kind, piece.x, piece.y, piece.rot, piece.color)
+        self.post((board.copy(), snapshot, list(preview), budget_s))
+
+    def cancel(self):
+        super().cancel()
+        self.best, self.done = None, True
+
+    def poll(self) -> Tuple[Optional[Placement], bool]:
+        """(best placement so far, whether the search has finished) for the latest request."""
+        for placement, final in self.replies():
+            self.best, self.done = placement, final
+        return self.best, self.done
@@ -0,0 +1,74 @@
+"""
+Generation-counted worker process, shared by the background bot (src.async_bot) and
+the perfect-clear hint (src.pc_solver).
+
+The game posts requests; each one bumps a shared generation counter, so the worker can
+tell from inside a long search that a newer request has made it stale and stop at once.
+Replies are tagged with the generation they answer and anything older is discarded on
+the game side, so the game only ever polls a queue and never waits on the worker.
+
+A handler is any picklable callable `handler(payload, should_stop, reply)`: it searches
+for `payload`, checks `should_stop()` as it goes and may `reply(result)` any number of
+times. One instance lives in the worker for its whole life, so it can keep state (e.g.
+a memo) from one request to the next.
+"""
+from __future__ import annotations
+import multiprocessing as mp
+import queue
+from typing import Any, Callable, List
+
+Handler = Callable[[Any, Callable[[], bool], Callable[[Any], None]], None]
+
+
+def _serve(requests, results, generation, handler: Handler):
+    while True:
+        request = requests.get()
+        if request is None:
+            return
+        gen, payload = request
+        if gen != generation.value:
+            continue
+        handler(payload, lambda: generation.value != gen, lambda result: results.put((gen, result)))
+
+
+class BackgroundWorker:
+    """Game-side handle on one worker process running `handler`."""
+
+    def __init__(self, handler: Handler):
+        # spawn rather than fork: the game process has SDL state a fork shouldn't inherit
+        ctx = mp.get_context("spawn")
+        self._requests = ctx.Queue()
+        self._results = ctx.Queue()
+        self._generation = ctx.Value("i", 0, lock=False)
+        self._process = ctx.Process(
+            target=_serve,
+            args=(self._requests, self._results, self._generation, handler),
+            daemon=True,
+        )
+        self._process.start()
+
+    def post(self, payload):
+        """Start on `payload`; whatever the worker was doing for an earlier request stops."""
+        self._generation.value += 1
+        self._requests.put((self._generation.value, payload))
+
+    def cancel(self):
+        self._generation.value += 1
+
+    def replies(self) -> List[Any]:
+        """Replies to the latest request received since the last call, oldest first."""
+        out = []
+        while True:
+            try:
+                gen, result = self._results.get_nowait()
+            except queue.Empty:
+                return out
+            if gen == self._generation.value:
+                out.append(result)
+
+    def close(self):
+        self.cancel()
+        self._requests.put(None)
+        self._process.join(timeout=1)
+        if self._process.is_alive():
+            self._process.terminate()
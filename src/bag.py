@@ -3,18 +3,48 @@ import math
 import random
 import sys
 from dataclasses import dataclass, field
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from .piece import Piece
 
 
+KINDS = ["I", "J", "L", "O", "S", "T", "Z"]
+
 
 class SevenBag:
-    def __init__(self):
+    """
+    Standard 7-bag randomiser. Every bag is shuffled from (seed, bag number) alone,
+    so a seed fully determines the piece sequence and a run can be reproduced.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.bags_drawn = 0
         self.bag: List[str] = []
 
+    def _make_bag(self, index: int) -> List[str]:
+        bag = list(KINDS)
+        random.Random(f"{self.seed}:{index}").shuffle(bag)
+        return bag
+
     def next(self) -> str:
         if not self.bag:
-            self.bag = ["I", "J", "L", "O", "S", "T", "Z"]
-            random.shuffle(self.bag)
+            self.bag = self._make_bag(self.bags_drawn)
+            self.bags_drawn += 1
         return self.bag.pop()
 
+    def state(self) -> Tuple[int, Tuple[str, ...]]:
+        """Everything `next` depends on besides the seed; small enough to keep per move."""
+        return self.bags_drawn, tuple(self.bag)
+
+    def restore(self, state: Tuple[int, Tuple[str, ...]]):
+        self.bags_drawn, bag = state
+        self.bag = list(bag)
+
+    def peek(self, n: int) -> List[str]:
+        """The next n kinds, in order, without consuming them."""
+        out = list(reversed(self.bag))
+        index = self.bags_drawn
+        while len(out) < n:
+            out.extend(reversed(self._make_bag(index)))
+            index += 1
+        return out[:n]
@@ -1,49 +1,231 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from .piece import Piece
 
+Color = Tuple[int, int, int]
+
+
+@dataclass
+class LockDelta:
+    """
+    What one `Board.lock` changed: the cells it wrote and the full rows it removed,
+    as (stack index, mask, colours) in removal order. Enough to undo or redo the lock
+    without copying the rest of the board.
+    """
+
+    cells: List[Tuple[int, int, Color]] = field(default_factory=list)
+    removed: List[Tuple[int, int, Dict[int, Color]]] = field(default_factory=list)
+
+
 class Board:
+    """
+    Playfield of arbitrary size. Each row is stored as an integer bitmask (bit x set
+    when column x is filled) together with a sparse {x: color} map, so collision tests
+    are a shift-and-mask no matter how wide the board is.
+
+    Only the occupied part of the board is kept: `_masks`/`_colors` hold rows from the
+    floor upwards (index 0 is the bottom row, y == rows - 1) and stop at the highest
+    non-empty row. Everything above the stack is implicitly empty, which keeps tall,
+    mostly-empty boards cheap, and clearing a line is a list deletion rather than a
+    rebuild of the whole grid.
+    """
+
     def __init__(self, cols: int, rows: int):
         self.cols = cols
         self.rows = rows
-        self.grid: List[List[Tuple[int,int,int] | None]] = [
-            [None for _ in range(cols)] for _ in range(rows)
-        ]
+        self.full_mask = (1 << cols) - 1
+        self.version = 0  # bumped on every change, for caches keyed on board contents
+        self._masks: List[int] = []
+        self._colors: List[Dict[int, Color]] = []
+
+    # ----------------------- geometry -----------------------
+    def _index(self, y: int) -> int:
+        """Stack index (0 == floor) for board row y."""
+        return self.rows - 1 - y
+
+    @property
+    def stack_height(self) -> int:
+        """Number of rows from the floor up to and including the highest filled row."""
+        return len(self._masks)
+
+    @property
+    def top_row(self) -> int:
+        """Board y of the highest filled row (== rows when the board is empty)."""
+        return self.rows - len(self._masks)
 
     def inside(self, x: int, y: int) -> bool:
         return 0 <= x < self.cols and 0 <= y < self.rows
 
+    # ----------------------- cell access --------------------
+    def row_mask(self, y: int) -> int:
+        i = self.rows - 1 - y
+        if 0 <= i < len(self._masks):
+            return self._masks[i]
+        return 0
+
+    def cell(self, x: int, y: int) -> Optional[Color]:
+        i = self.rows - 1 - y
+        if 0 <= i < len(self._colors):
+            return self._colors[i].get(x)
+        return None
+
+    def row_cells(self, y: int) -> Iterable[Tuple[int, Color]]:
+        """(x, color) pairs of the filled cells in row y."""
+        i = self.rows - 1 - y
+        if 0 <= i < len(self._colors):
+            return self._colors[i].items()
+        return ()
+
+    def occupied_rows(self, top: int = 0, bottom: Optional[int] = None) -> Iterator[int]:
+        """Board y of every non-empty row within [top, bottom), bottom to top."""
+        if bottom is None:
+            bottom = self.rows
+        lo = max(0, self._index(bottom - 1))
+        hi = min(len(self._masks), self._index(top) + 1)
+        for i in range(lo, hi):
+            if self._masks[i]:
+                yield self.rows - 1 - i
+
+    @property
+    def grid(self) -> List[List[Optional[Color]]]:
+        """Dense rows x cols copy of the board. O(area); meant for debugging/export."""
+        return [[self.cell(x, y) for x in range(self.cols)] for y in range(self.rows)]
+
     def empty_at(self, x: int, y: int) -> bool:
-        return self.inside(x, y) and self.grid[y][x] is None
+        return self.inside(x, y) and not (self.row_mask(y) >> x) & 1
 
     def valid(self, piece: Piece) -> bool:
+        masks, rows, cols = self._masks, self.rows, self.cols
+        height = len(masks)
         for (x, y) in piece.blocks():
-            if not self.inside(x, y):
+            if not (0 <= x < cols and 0 <= y < rows):
                 return False
-            if self.grid[y][x] is not None:
+            i = rows - 1 - y
+            if i < height and (masks[i] >> x) & 1:
                 return False
         return True
 
-    def lock(self, piece: Piece) -> int:
+    def key(self) -> Tuple[int, ...]:
+        """Canonical, hashable contents: row masks from the floor up (colours ignored)."""
+        return tuple(self._masks)
+
+    def filled(self) -> int:
+        return sum(bin(m).count("1") for m in self._masks)
+
+    def column_heights(self) -> List[int]:
+        """Filled height of every column (0 for an empty one)."""
+        heights = [0] * self.cols
+        remaining = self.full_mask
+        for i in range(len(self._masks) - 1, -1, -1):
+            hit = self._masks[i] & remaining
+            remaining &= ~hit
+            while hit:
+                low = hit & -hit
+                heights[low.bit_length() - 1] = i + 1
+                hit ^= low
+            if not remaining:
+                break
+        return heights
+
+    def copy(self) -> "Board":
+        other = Board(self.cols, self.rows)
+        other._masks = list(self._masks)
+        other._colors = [dict(c) for c in self._colors]
+        return other
+
+    # ----------------------- mutation -----------------------
+    def _set(self, x: int, y: int, color: Color):
+        i = self.rows - 1 - y
+        while len(self._masks) <= i:
+            self._masks.append(0)
+            self._colors.append({})
+        self._masks[i] |= 1 << x
+        self._colors[i][x] = color
+        self.version += 1
+
+    def fill(self, cells: Iterable[Tuple[int, int]], color: Color = (128, 128, 128)):
+        """Fill cells as they are, without clearing lines: for building fixture boards."""
+        for x, y in cells:
+            self._set(x, y, color)
+
+    def lock(self, piece: Piece, delta: Optional[LockDelta] = None) -> int:
+        """Write the piece and clear lines; the changes are recorded into `delta` if given."""
+        touched = set()
         for (x, y) in piece.blocks():
             if 0 <= y < self.rows:
-                self.grid[y][x] = piece.color
-        return self.clear_lines()
+                self._set(x, y, piece.color)
+                touched.add(y)
+                if delta is not None:
+                    delta.cells.append((x, y, piece.color))
+        return self.clear_lines(touched, None if delta is None else delta.removed)
+
+    def clear_lines(
+        self,
+        rows: Optional[Iterable[int]] = None,
+        removed: Optional[List[Tuple[int, int, Dict[int, Color]]]] = None,
+    ) -> int:
+        """
+        Remove full rows and let everything above them fall. When `rows` is given only
+        those rows are checked, so a lock only pays for the rows the piece touched.
+        Removed rows are appended to `removed` if given.
+        """
+        if rows is None:
+            indices = range(len(self._masks))
+        else:
+            indices = [self._index(y) for y in rows]
+        full = sorted(
+            (i for i in indices if 0 <= i < len(self._masks) and self._masks[i] == self.full_mask),
+            reverse=True,
+        )
+        for i in full:
+            if removed is not None:
+                removed.append((i, self._masks[i], self._colors[i]))
+            del self._masks[i]
+            del self._colors[i]
+            self.version += 1
+        while self._masks and not self._masks[-1]:
+            self._masks.pop()
+            self._colors.pop()
+        return len(full)
+
+    def undo_lock(self, delta: LockDelta):
+        """Revert a lock recorded by `lock(piece, delta)`; must be the board's latest change."""
+        for i, mask, colors in reversed(delta.removed):
+            while len(self._masks) < i:
+                self._masks.append(0)
+                self._colors.append({})
+            self._masks.insert(i, mask)
+            self._colors.insert(i, dict(colors))
+        for x, y, _ in delta.cells:
+            i = self._index(y)
+            self._masks[i] &= ~(1 << x)
+            del self._colors[i][x]
+        while self._masks and not self._masks[-1]:
+            self._masks.pop()
+            self._colors.pop()
+        self.version += 1
 
-    def clear_lines(self) -> int:
-        new_rows = [row for row in self.grid if any(cell is None for cell in row)]
-        cleared = self.rows - len(new_rows)
-        if cleared:
-            self.grid = [[None for _ in range(self.cols)] for _ in range(cleared)] + new_rows
-        return cleared
+    def redo_lock(self, delta: LockDelta) -> int:
+        """Re-apply a lock reverted by `undo_lock`."""
+        touched = set()
+        for x, y, color in delta.cells:
+            self._set(x, y, color)
+            touched.add(y)
+        return self.clear_lines(touched)
 
     def drop_distance(self, piece: Piece) -> int:
-        dy = 0
-        test = Piece(piece.kind, piece.x, piece.y, piece.rot, piece.color)
+        # Anything above the stack falls freely, so jump straight to its surface
+        # instead of stepping through every empty row of a tall board.
+        lowest = max(y for (_, y) in piece.blocks())
+        dy = max(0, self.top_row - 1 - lowest)
+        test = Piece(piece.kind, piece.x, piece.y + dy, piece.rot, piece.color)
+        if not self.valid(test):
+            dy = 0
+            test.y = piece.y
         while True:
             test.y += 1
             if not self.valid(test):
                 break
             dy += 1
-        return dy
\ No newline at end of file
+        return dy
@@ -0,0 +1,144 @@
+"""
+Randomised regression check for Board. Plays random games on boards of random sizes,
+mirroring every lock on a plain dense grid (a list of colour rows, cleared by rebuilding
+it - no bitmasks, no sparse rows) and compares the two after each step: cells, key,
+filled count, column heights, stack height, and where the next piece would land. At the
+end of each game every placement is taken back with `undo_lock` and replayed with
+`redo_lock`, checking the board against the grid's state at each step.
+
+Like `src.perft`, this is the oracle to run after changing Board: it exits 1 at the
+first disagreement and prints the game seed, so the failure can be replayed.
+
+Usage: python -m src.board_check --games 300
+"""
+from __future__ import annotations
+import argparse
+import random
+from typing import List, Optional, Sequence, Tuple
+
+from .bag import KINDS
+from .board import Board, Color, LockDelta
+from .config import COLORS
+from .movegen import placements, spawn
+from .piece import Piece
+
+Grid = List[List[Optional[Color]]]
+
+
+class Mismatch(AssertionError):
+    pass
+
+
+def grid_lock(grid: Grid, piece: Piece) -> int:
+    """Reference lock: write the cells, then rebuild the grid without its full rows."""
+    rows, cols = len(grid), len(grid[0])
+    for x, y in piece.blocks():
+        if 0 <= y < rows:
+            grid[y][x] = piece.color
+    kept = [row for row in grid if not all(c is not None for c in row)]
+    cleared = rows - len(kept)
+    grid[:] = [[None] * cols for _ in range(cleared)] + kept
+    return cleared
+
+
+def grid_valid(grid: Grid, piece: Piece) -> bool:
+    rows, cols = len(grid), len(grid[0])
+    return all(0 <= x < cols and 0 <= y < rows and grid[y][x] is None for x, y in piece.blocks())
+
+
+def grid_drop(grid: Grid, piece: Piece) -> int:
+    dy = 0
+    while grid_valid(grid, Piece(piece.kind, piece.x, piece.y + dy + 1, piece.rot)):
+        dy += 1
+    return dy
+
+
+def compare(board: Board, grid: Grid, where: str):
+    """Raise Mismatch unless `board` holds exactly `grid`, by every query Board answers."""
+    rows, cols = len(grid), len(grid[0])
+    if board.grid != grid:
+        raise Mismatch(f"{where}: cells differ")
+    masks = [sum(1 << x for x in range(cols) if grid[y][x] is not None) for y in range(rows - 1, -1, -1)]
+    while masks and not masks[-1]:
+        masks.pop()
+    checks = {
+        "key": (board.key(), tuple(masks)),
+        "stack_height": (board.stack_height, len(masks)),
+        "top_row": (board.top_row, rows - len(masks)),
+        "filled": (board.filled(), sum(c is not None for row in grid for c in row)),
+        "column_heights": (board.column_heights(), [
+            next((rows - y for y in range(rows) if grid[y][x] is not None), 0) for x in range(cols)
+        ]),
+    }
+    for kind in KINDS:
+        piece = spawn(kind, cols)
+        valid = grid_valid(grid, piece)
+        checks[f"valid({kind})"] = (board.valid(piece), valid)
+        if valid:
+            checks[f"drop_distance({kind})"] = (board.drop_distance(piece), grid_drop(grid, piece))
+    for name, (got, want) in checks.items():
+        if got != want:
+            raise Mismatch(f"{where}: {name} is {got}, expected {want}")
+
+
+def check_game(seed: int, max_pieces: int = 200) -> Tuple[int, int]:
+    """One random game plus its full undo/redo; returns (placements, lines cleared)."""
+    rng = random.Random(seed)
+    cols, rows = rng.randint(4, 12), rng.randint(6, 24)
+    board = Board(cols, rows)
+    grid: Grid = [[None] * cols for _ in range(rows)]
+    states = [[list(row) for row in grid]]
+    deltas: List[Tuple[LockDelta, int]] = []
+    for n in range(max_pieces):
+        kind = rng.choice(KINDS)
+        options = placements(board, spawn(kind, cols), with_moves=rng.random() < 0.5)
+        if not options:
+            break
+        # Mostly low placements, so rows fill up and clear
+        options.sort(key=lambda p: -p.y)
+        placement = options[0] if rng.random() < 0.6 else rng.choice(options)
+        piece = placement.piece(COLORS[kind])
+        delta = LockDelta()
+        version = board.version
+        cleared = board.lock(piece, delta)
+        want = grid_lock(grid, piece)
+        if cleared != want:
+            raise Mismatch(f"seed {seed} piece {n}: lock cleared {cleared} lines, expected {want}")
+        if board.version == version:
+            raise Mismatch(f"seed {seed} piece {n}: version not bumped")
+        compare(board, grid, f"seed {seed} piece {n}")
+        deltas.append((delta, cleared))
+        states.append([list(row) for row in grid])
+
+    for n in range(len(deltas) - 1, -1, -1):
+        board.undo_lock(deltas[n][0])
+        compare(board, states[n], f"seed {seed} undo to {n}")
+    for n, (delta, cleared) in enumerate(deltas):
+        if board.redo_lock(delta) != cleared:
+            raise Mismatch(f"seed {seed} redo {n}: line count differs")
+        compare(board, states[n + 1], f"seed {seed} redo {n}")
+    return len(deltas), sum(c for _, c in deltas)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.board_check", description="Check Board against a dense grid")
+    parser.add_argument("--games", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0, help="first game seed")
+    parser.add_argument("--pieces", type=int, default=200, help="piece cap per game")
+    args = parser.parse_args(argv)
+
+    placed = lines = 0
+    for seed in range(args.seed, args.seed + args.games):
+        try:
+            n, cleared = check_game(seed, args.pieces)
+        except Mismatch as e:
+            print(f"MISMATCH {e}")
+            return 1
+        placed += n
+        lines += cleared
+    print(f"{args.games} games, {placed} placements, {lines} lines: ok")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
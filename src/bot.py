@@ -0,0 +1,82 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from .board import Board
+from .movegen import Placement, placements
+from .piece import Piece
+
+if TYPE_CHECKING:
+    from .lut import PlacementTable
+
+
+@dataclass(frozen=True)
+class Weights:
+    """Linear evaluation weights (defaults: the well-known El-Tetris style tuning)."""
+
+    height: float = -0.510066
+    lines: float = 0.760666
+    holes: float = -0.35663
+    bumpiness: float = -0.184483
+
+
+def features(board: Board) -> Tuple[int, int, int]:
+    """(aggregate height, holes, bumpiness) of a board."""
+    heights = board.column_heights()
+    aggregate = sum(heights)
+    holes = aggregate - board.filled()
+    bumpiness = sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+    return aggregate, holes, bumpiness
+
+
+def evaluate(board: Board, cleared: int, weights: Weights) -> float:
+    """Score of the board left after a placement that cleared `cleared` lines."""
+    aggregate, holes, bumpiness = features(board)
+    return (
+        weights.height * aggregate
+        + weights.lines * cleared
+        + weights.holes * holes
+        + weights.bumpiness * bumpiness
+    )
+
+
+def best_placement(board: Board, piece: Piece, weights: Weights) -> Optional[Placement]:
+    """One-piece greedy search over every reachable placement."""
+    best, best_score = None, float("-inf")
+    for placement in placements(board, piece):
+        child = board.copy()
+        cleared = child.lock(placement.piece(piece.color))
+        score = evaluate(child, cleared, weights)
+        if score > best_score:
+            best, best_score = placement, score
+    return best
+
+
+class Bot:
+    """
+    Heuristic player. Asks the precomputed placement table first (a single lookup for
+    surface shapes it covers) and falls back to a full search for everything else.
+    """
+
+    def __init__(self, weights: Weights = Weights(), table: Optional["PlacementTable"] = None):
+        self.weights = weights
+        self.table = table
+        self.lookups = 0
+
+    def choose(self, board: Board, piece: Piece) -> Optional[Placement]:
+        if self.table is not None:
+            placement = self.table.lookup(board, piece)
+            if placement is not None:
+                self.lookups += 1
+                return placement
+        return best_placement(board, piece, self.weights)
+
+
+def perform(inputs, placement: Placement):
+    """Play a placement through the game's input callbacks (see InputManager), then hard drop."""
+    for move in placement.moves:
+        if move[0] == "move":
+            inputs.on_move(move[1], move[2])
+        else:
+            inputs.on_rotate(move[1])
+    inputs.on_hard_drop()
@@ -0,0 +1,21 @@
+"""Small helpers shared by the command-line tools (src.tournament, src.stats, src.video, ...)."""
+from __future__ import annotations
+import os
+
+
+def use_dummy_drivers(signal_handlers: bool = True):
+    """
+    Run SDL headless: no window, no audio device. Call before pygame initialises. Pool
+    workers pass `signal_handlers=False`: SDL otherwise turns SIGTERM into a quit event,
+    which would keep Pool.terminate() from ever stopping a worker that has initialised pygame.
+    """
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    if not signal_handlers:
+        os.environ["SDL_NO_SIGNAL_HANDLERS"] = "1"
+
+
+def seed_range(text: str) -> range:
+    """argparse type for seeds: "LO:HI" is range(LO, HI), a single number just that seed."""
+    lo, _, hi = text.partition(":")
+    return range(int(lo), int(hi)) if hi else range(int(lo), int(lo) + 1)
@@ -2,7 +2,13 @@ CONFIG = {
     "COLS": 10,
     "ROWS": 20,
     "CELL": 32,  # pixel size of one cell
+    # Rows visible at once; taller boards scroll to follow the falling piece
+    "VIEW_ROWS": 20,
+    # Draw the board from an 8-bit palette-indexed surface (needs numpy)
+    "INDEXED_BOARD": True,
     "FPS": 60,
+    # Longest the loop blocks waiting for events while paused or on the game-over screen
+    "IDLE_WAIT_MS": 1000,
     # Gravity timing in milliseconds at level 0. Gets faster with level.
     "BASE_FALL_MS": 800,
     # Each level reduces the fall time by this percentage (clamped)
@@ -10,6 +16,14 @@ CONFIG = {
     # DAS (delayed auto shift) and ARR (auto repeat rate) in ms for LR keys
     "DAS_MS": 160,
     "ARR_MS": 40,
+    # Placements kept for rewind (Backspace undoes one, T scrubs through them)
+    "REWIND_DEPTH": 1000,
+    # Background bot (A toggles): pieces searched (current + preview) and the share of
+    # the gravity interval it may think before the piece is played
+    "BOT_DEPTH": 2,
+    "BOT_THINK": 0.8,
+    # Pieces (current + preview) the background perfect-clear hint searches with (H toggles it)
+    "PC_QUEUE": 10,
 }
 
 # NES-like scoring (scaled by (level+1))
@@ -20,6 +34,7 @@ COLORS = {
     "bg": (16, 18, 20),
     "grid": (32, 36, 40),
     "ghost": (85, 85, 85),
+    "hint": (245, 245, 245),
     "text": (230, 238, 245),
     # Tetromino colors
     "I": (80, 227, 230),
@@ -72,4 +87,7 @@ SHAPES = {
         [(-1, 0), (0, 0), (0, 1), (1, 1)],
         [(1, -1), (1, 0), (0, 0), (0, 1)],
     ],
-}
\ No newline at end of file
+}
+
+# Horizontal offsets tried, in order, when a rotation collides
+KICKS = [0, -1, 1, -2, 2]
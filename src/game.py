@@ -1,37 +1,59 @@
 
 from __future__ import annotations
+import random
 import sys
+from typing import Callable
 from .sound_manager import SoundManager
+from .async_bot import AsyncBot
 from .bag import SevenBag
-from .board import Board
+from .board import Board, LockDelta
+from .bot import Weights, perform
 from .config import COLORS, SCORES, SHAPES, CONFIG
+from .history import History, Step
 from .input_manager import InputManager
+from .movegen import Placement, placements, rotate, spawn
+from .pc_solver import AsyncSolver
 from .piece import Piece
 from .renderer import Renderer
+from .shm_export import Publisher
 import pygame
 
 class Tetris:
-    def __init__(self):
-        self.cols, self.rows, self.cell = CONFIG["COLS"], CONFIG["ROWS"], CONFIG["CELL"]
-        self.width, self.height = self.cols * self.cell, self.rows * self.cell
+    def __init__(
+        self,
+        cols: int | None = None,
+        rows: int | None = None,
+        seed: int | None = None,
+        screen: pygame.Surface | None = None,
+        ticks: Callable[[], int] | None = None,
+    ):
+        """
+        `screen`, when given, is an offscreen surface to draw into instead of a window.
+        `ticks` replaces pygame's millisecond clock, e.g. with a simulated one that makes
+        gravity deterministic (see the profiler).
+        """
+        self.ticks = ticks if ticks is not None else pygame.time.get_ticks
+        self.cols = cols if cols is not None else CONFIG["COLS"]
+        self.rows = rows if rows is not None else CONFIG["ROWS"]
+        self.cell = CONFIG["CELL"]
+        self.view_rows = min(self.rows, CONFIG["VIEW_ROWS"])
+        self.width, self.height = self.cols * self.cell, self.view_rows * self.cell
         pygame.init()
-        pygame.display.set_caption("Pygame Tetris")
-        self.screen = pygame.display.set_mode((self.width, self.height))
+        self.offscreen = screen is not None
+        if self.offscreen:
+            self.screen = screen
+        else:
+            pygame.display.set_caption("Pygame Tetris")
+            self.screen = pygame.display.set_mode((self.width, self.height))
         self.clock = pygame.time.Clock()
-        self.renderer = Renderer(self.screen, self.cell)
+        self.renderer = Renderer(self.screen, self.cell, self.view_rows)
         self.sounds = SoundManager("assets", sounds={"ping": "ping.mp3"})
 
-        self.board = Board(self.cols, self.rows)
-        self.bag = SevenBag()
-        self.score = 0
-        self.level = 0
-        self.lines = 0
-        self.paused = False
-        self.game_over = False
-
-        self.cur = self._spawn()
-        self.fall_ms = CONFIG["BASE_FALL_MS"]
-        self.last_fall = 0
+        self.bot: AsyncBot | None = None
+        self.pc_solver: AsyncSolver | None = None  # started the first time the hint is shown
+        self.publisher: Publisher | None = None  # see --shm
+        self._drawn: tuple | None = None  # view_state() of the last frame drawn by tick()
+        self._last_tick = 0
 
         self.inputs = InputManager(
             CONFIG,
@@ -39,34 +61,90 @@ class Tetris:
             on_rotate=self._rotate,
             on_hard_drop=self._hard_drop,
             on_toggle_pause=self.toggle_pause,
+            on_toggle_hint=self.toggle_hint,
+            on_toggle_bot=self.toggle_bot,
+            on_undo=self.undo,
+            on_toggle_scrub=self.toggle_scrub,
+            on_scrub=self.scrub,
             on_restart=self.restart,
             on_quit=self.quit,
             is_paused=lambda: self.paused,
             is_game_over=lambda: self.game_over,
+            is_scrubbing=lambda: self.scrubbing,
         )
+        self.reset(seed)
+
+    def reset(self, seed: int | None = None):
+        """Start a new game. Only game state is rebuilt; pygame, the window and sounds are kept."""
+        self.board = Board(self.cols, self.rows)
+        self.bag = SevenBag(seed)
+        self.seed = self.bag.seed  # drawn at random when `seed` is None
+        self.score = 0
+        self.level = 0
+        self.lines = 0
+        self.paused = False
+        self.game_over = False
+        self.show_hint = False
+        self.hint: Placement | None = None
+        self._pc_plan: list[Placement] = []
+        if self.pc_solver is not None:
+            self.pc_solver.cancel()
+        self.history = History(CONFIG["REWIND_DEPTH"])
+        self.scrubbing = False
+        self._bot_deadline = 0
+        self._bot_for: tuple | None = None  # (board version, piece kind) the bot is searching
+        self.fall_ms = CONFIG["BASE_FALL_MS"]
+        self.last_fall = 0
+
+        self.cur = self._spawn()
 
     # ----------------------- helpers -----------------------
     def _spawn(self) -> Piece:
         k = self.bag.next()
-        color = COLORS[k]
-        # spawn near top; y=0 or -? We'll spawn at row 0 with offsets designed
-        p = Piece(k, self.cols // 2, 0, 0, color)
-        # nudge up a bit so rotation states fit
-        p.y = 1
+        p = spawn(k, self.cols, COLORS[k])
         if not self.board.valid(p):
             self.game_over = True
+        self._update_hint(p)
+        self._think(p)
         return p
 
-    def _rotate(self, dr: int):
-        if self.cur.kind == "O":
+    def _think(self, piece: Piece):
+        """Hand the new piece to the background bot, if it is playing."""
+        if self.bot is None or self.game_over:
             return
-        candidate = self.cur.rotated(dr)
-        # wall kicks
-        for dx in [0, -1, 1, -2, 2]:
-            test = Piece(candidate.kind, candidate.x + dx, candidate.y, candidate.rot, candidate.color)
-            if self.board.valid(test):
-                self.cur = test
-                return
+        budget = self.fall_ms * CONFIG["BOT_THINK"]
+        now = self.ticks()
+        self._bot_deadline = now + int(budget)
+        self._bot_for = (self.board.version, piece.kind)
+        # Hold gravity until the answer is in, so the piece is still where it was searched from
+        self.last_fall = now
+        self.bot.think(self.board, piece, self.bag.peek(CONFIG["BOT_DEPTH"] - 1), budget / 1000)
+
+    def _update_hint(self, piece: Piece):
+        """Point at the next step of a perfect clear, asking the background solver if we have none."""
+        self.hint = None
+        if not self.show_hint or self.game_over:
+            return
+        if self._pc_plan:
+            self.hint = self._pc_plan[0]
+            return
+        if self.pc_solver is None:
+            self.pc_solver = AsyncSolver()
+        self.pc_solver.think(self.board, [piece.kind] + self.bag.peek(CONFIG["PC_QUEUE"] - 1))
+
+    def _poll_hint(self):
+        """Take a plan from the background solver once it has finished for this piece."""
+        if self.pc_solver is None or not self.pc_solver.busy:
+            return
+        plan, done = self.pc_solver.poll()
+        if done and plan and self.show_hint and plan[0].kind == self.cur.kind:
+            self._pc_plan = plan
+            self.hint = plan[0]
+
+    def _rotate(self, dr: int):
+        rotated = rotate(self.board, self.cur, dr)
+        if rotated is not None:
+            self.cur = rotated
 
     def _move(self, dx: int, dy: int) -> bool:
         test = Piece(self.cur.kind, self.cur.x + dx, self.cur.y + dy, self.cur.rot, self.cur.color)
@@ -81,8 +159,17 @@ class Tetris:
             self.cur.y += dy
         self._lock()
 
+    def _stats(self) -> tuple[int, int, int, int]:
+        return self.score, self.level, self.lines, self.fall_ms
+
     def _lock(self):
-        cleared = self.board.lock(self.cur)
+        if self._pc_plan and frozenset(self.cur.blocks()) == self._pc_plan[0].cells():
+            self._pc_plan.pop(0)
+        else:
+            self._pc_plan = []
+        before, bag = self._stats(), self.bag.state()
+        delta = LockDelta()
+        cleared = self.board.lock(self.cur, delta)
         self.sounds.play("ping")
         if cleared:
             self.lines += cleared
@@ -92,52 +179,198 @@ class Tetris:
             if new_level != self.level:
                 self.level = new_level
                 self.fall_ms = max(60, int(CONFIG["BASE_FALL_MS"] * (CONFIG["LVL_ACCEL"] ** self.level)))
+        self.history.record(Step(self.cur.kind, delta, before, self._stats(), bag))
+        self.cur = self._spawn()
+
+    # ----------------------- rewind --------------------------
+    def _rewound(self, stats: tuple[int, int, int, int], bag: tuple):
+        self.score, self.level, self.lines, self.fall_ms = stats
+        self.bag.restore(bag)
+        self.game_over = False
+        self._pc_plan = []
+        self.last_fall = self.ticks()
+
+    def undo(self) -> bool:
+        """Take back the last placement: its piece returns to the spawn position."""
+        step = self.history.undo()
+        if step is None:
+            return False
+        self.board.undo_lock(step.delta)
+        self._rewound(step.stats_before, step.bag)
+        self.cur = spawn(step.kind, self.cols, COLORS[step.kind])
+        self._update_hint(self.cur)
+        self._think(self.cur)
+        return True
+
+    def redo(self) -> bool:
+        step = self.history.redo()
+        if step is None:
+            return False
+        self.board.redo_lock(step.delta)
+        self._rewound(step.stats_after, step.bag)
         self.cur = self._spawn()
+        return True
+
+    def scrub(self, steps: int):
+        """Move `steps` placements back (negative) or forward through the history."""
+        move = self.undo if steps < 0 else self.redo
+        for _ in range(abs(steps)):
+            if not move():
+                break
 
     # ----------------------- input handling -----------------
     def toggle_pause(self):
         self.paused = not self.paused
 
+    def toggle_scrub(self):
+        """Freeze the game and let left/right walk through history; play resumes from there."""
+        self.scrubbing = not self.scrubbing
+        self.last_fall = self.ticks()
+
+    def toggle_bot(self):
+        if self.bot is None:
+            self.bot = AsyncBot(Weights(), CONFIG["BOT_DEPTH"])
+            self._think(self.cur)
+        else:
+            self.bot.close()
+            self.bot = None
+
+    def toggle_hint(self):
+        self.show_hint = not self.show_hint
+        self._pc_plan = []
+        if not self.show_hint and self.pc_solver is not None:
+            self.pc_solver.cancel()
+        self._update_hint(self.cur)
+
     def restart(self):
-        self.__init__()
+        """New game, seeded from this one's seed: a run's games all follow from its first seed."""
+        self.reset(random.Random(self.seed).randrange(2**32))
 
     def quit(self):
+        if self.bot is not None:
+            self.bot.close()
+        if self.pc_solver is not None:
+            self.pc_solver.close()
+        if self.publisher is not None:
+            self.publisher.close()
         pygame.quit(); sys.exit(0)
 
     # ----------------------- update & draw -------------------
+    def _fall_interval(self) -> int:
+        if self.inputs.soft_drop_active:
+            # faster soft drop
+            return max(40, self.fall_ms // 15)
+        return self.fall_ms
+
     def update(self, dt_ms: int):
-        if self.paused or self.game_over:
+        if self.paused or self.game_over or self.scrubbing:
             return
-        now = pygame.time.get_ticks()
+        now = self.ticks()
         self.inputs.update(now)
-        if self.inputs.soft_drop_active:
-            # faster soft drop
-            if now - self.last_fall > max(40, self.fall_ms // 15):
-                if not self._move(0, 1):
-                    self._lock()
-                self.last_fall = now
-        else:
-            if now - self.last_fall > self.fall_ms:
-                if not self._move(0, 1):
-                    self._lock()
-                self.last_fall = now
+        self._poll_hint()
+        if self.bot is not None:
+            # Play the bot's answer once it is final, or the best so far when time is up
+            placement, done = self.bot.poll()
+            if placement is not None and (done or now >= self._bot_deadline):
+                self._play_bot(placement)
+                return
+        if now - self.last_fall > self._fall_interval():
+            if not self._move(0, 1):
+                self._lock()
+            self.last_fall = now
+
+    def _play_bot(self, placement: Placement):
+        """
+        Play the bot's answer, routed from wherever the piece is now (the player may
+        have moved it meanwhile). An answer for another board or piece, or one that is
+        no longer reachable, is dropped and the bot asked again.
+        """
+        if (self.board.version, self.cur.kind) != self._bot_for:
+            self._think(self.cur)
+            return
+        cells = placement.cells()
+        route = next((p for p in placements(self.board, self.cur) if p.cells() == cells), None)
+        if route is None:
+            self._think(self.cur)
+            return
+        perform(self.inputs, route)
+
+    def next_deadline(self, now: int) -> int | None:
+        """Tick at which `update` next has something to do (gravity or auto-shift); None when idle."""
+        if self.paused or self.game_over or self.scrubbing:
+            return None
+        deadline = self.last_fall + self._fall_interval() + 1
+        if (self.bot is not None and not self.bot.done) or (self.pc_solver is not None and self.pc_solver.busy):
+            # keep polling for the bot's answer or the hint at frame rate
+            deadline = min(deadline, now + 1000 // CONFIG["FPS"])
+        shift = self.inputs.next_deadline(now)
+        return deadline if shift is None else min(deadline, shift)
+
+    def view_state(self) -> tuple:
+        """Everything `draw` depends on; the frame only needs redrawing when this changes."""
+        cur = self.cur
+        return (
+            cur.kind, cur.x, cur.y, cur.rot, self.board.version, self.hint,
+            self.score, self.level, self.lines, self.paused, self.game_over,
+            self.scrubbing, self.history.cursor,
+        )
 
     def draw(self):
+        self.renderer.follow(self.cur, self.board)
         self.renderer.draw_board(self.board)
         if not self.game_over:
             self.renderer.draw_ghost(self.cur, self.board)
+            if self.hint is not None:
+                self.renderer.draw_hint(self.hint.piece())
             self.renderer.draw_piece(self.cur)
-        self.renderer.hud(self.score, self.level, self.lines, self.paused, self.game_over)
-        pygame.display.flip()
+        rewind = (self.history.cursor, len(self.history)) if self.scrubbing else None
+        self.renderer.hud(self.score, self.level, self.lines, self.paused, self.game_over, rewind)
+        if not self.offscreen:
+            pygame.display.flip()
 
     # ----------------------- main loop -----------------------
+    def _wait_for_events(self) -> list:
+        """
+        Pending events, or block until one arrives or the next gravity/auto-shift
+        deadline passes. Paused and game-over screens have no deadline, so the loop
+        sleeps in IDLE_WAIT_MS slices instead of spinning at FPS.
+        """
+        events = pygame.event.get()
+        if events:
+            return events
+        now = self.ticks()
+        deadline = self.next_deadline(now)
+        timeout = CONFIG["IDLE_WAIT_MS"] if deadline is None else deadline - now
+        if timeout <= 0:
+            return []
+        event = pygame.event.wait(timeout)
+        return [] if event.type == pygame.NOEVENT else [event] + pygame.event.get()
+
+    def tick(self, events: list, limit_fps: bool = True):
+        """One pass of the main loop: handle `events`, advance the game, redraw if needed."""
+        now = self.ticks()
+        dt, self._last_tick = now - self._last_tick, now
+        for e in events:
+            if e.type == pygame.QUIT:
+                self.quit()
+            elif e.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self._drawn = None
+            else:
+                self.inputs.handle_event(e)
+        self.update(dt)
+        state = self.view_state()
+        if state != self._drawn:
+            if self.publisher is not None:
+                self.publisher.publish_game(self)
+            self.draw()
+            self._drawn = state
+            if limit_fps:
+                # Caps redraws at FPS (sleeps only what is left of the frame since the
+                # previous draw); iterations with nothing to draw skip it entirely.
+                self.clock.tick(CONFIG["FPS"])
+
     def run(self):
+        self._drawn = None
+        self._last_tick = self.ticks()
         while True:
-            dt = self.clock.tick(CONFIG["FPS"])
-            for e in pygame.event.get():
-                if e.type == pygame.QUIT:
-                    self.quit()
-                else:
-                    self.inputs.handle_event(e)
-            self.update(dt)
-            self.draw()
+            self.tick(self._wait_for_events())
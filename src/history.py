@@ -0,0 +1,56 @@
+from __future__ import annotations
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Optional, Tuple
+
+from .board import LockDelta
+
+
+@dataclass
+class Step:
+    """
+    One placement: the board delta of its lock plus the small game state around it.
+    `stats_*` are (score, level, lines, fall_ms); `bag` is the SevenBag state at lock
+    time, i.e. after the placed piece was drawn and before the next one.
+    """
+
+    kind: str
+    delta: LockDelta
+    stats_before: Tuple[int, int, int, int]
+    stats_after: Tuple[int, int, int, int]
+    bag: Tuple[int, Tuple[str, ...]]
+
+
+class History:
+    """
+    Bounded undo/redo list of placements. Steps live in a ring (deque with maxlen) so a
+    session of any length keeps at most `depth` of them; the oldest falls off the end.
+    `cursor` counts the steps currently applied - anything past it can be redone until
+    a new placement is recorded.
+    """
+
+    def __init__(self, depth: int):
+        self.steps: Deque[Step] = deque(maxlen=depth)
+        self.cursor = 0
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def record(self, step: Step):
+        while len(self.steps) > self.cursor:
+            self.steps.pop()
+        self.steps.append(step)
+        self.cursor = len(self.steps)
+
+    def undo(self) -> Optional[Step]:
+        if self.cursor == 0:
+            return None
+        self.cursor -= 1
+        return self.steps[self.cursor]
+
+    def redo(self) -> Optional[Step]:
+        if self.cursor == len(self.steps):
+            return None
+        step = self.steps[self.cursor]
+        self.cursor += 1
+        return step
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Callable
+from typing import Callable, Optional
 import pygame
 
 
@@ -19,20 +19,32 @@ class InputManager:
         on_rotate: Callable[[int], None],
         on_hard_drop: Callable[[], None],
         on_toggle_pause: Callable[[], None],
+        on_toggle_hint: Callable[[], None],
+        on_toggle_bot: Callable[[], None],
+        on_undo: Callable[[], bool],
+        on_toggle_scrub: Callable[[], None],
+        on_scrub: Callable[[int], None],
         on_restart: Callable[[], None],
         on_quit: Callable[[], None],
         is_paused: Callable[[], bool],
         is_game_over: Callable[[], bool],
+        is_scrubbing: Callable[[], bool],
     ):
         self.cfg = config
         self.on_move = on_move
         self.on_rotate = on_rotate
         self.on_hard_drop = on_hard_drop
         self.on_toggle_pause = on_toggle_pause
+        self.on_toggle_hint = on_toggle_hint
+        self.on_toggle_bot = on_toggle_bot
+        self.on_undo = on_undo
+        self.on_toggle_scrub = on_toggle_scrub
+        self.on_scrub = on_scrub
         self.on_restart = on_restart
         self.on_quit = on_quit
         self.is_paused = is_paused
         self.is_game_over = is_game_over
+        self.is_scrubbing = is_scrubbing
 
         self._down_held = False
         self.lr_state = {
@@ -53,18 +65,38 @@ class InputManager:
         if e.key == pygame.K_p:
             self.on_toggle_pause()
             return
+        if e.key == pygame.K_t:
+            self.on_toggle_scrub()
+            return
+        if self.is_scrubbing():
+            # Shift scrubs ten placements at a time
+            step = 10 if e.mod & pygame.KMOD_SHIFT else 1
+            if e.key in (pygame.K_LEFT, pygame.K_BACKSPACE):
+                self.on_scrub(-step)
+            elif e.key == pygame.K_RIGHT:
+                self.on_scrub(step)
+            return
         if self.is_game_over():
             if e.key == pygame.K_r:
                 self.on_restart()
+            elif e.key == pygame.K_BACKSPACE:
+                self.on_undo()
             return
         if self.is_paused():
             return
+        if e.key == pygame.K_BACKSPACE:
+            self.on_undo()
+            return
         if e.key in (pygame.K_UP, pygame.K_x):
             self.on_rotate(-1)
         elif e.key == pygame.K_z:
             self.on_rotate(1)
         elif e.key == pygame.K_SPACE:
             self.on_hard_drop()
+        elif e.key == pygame.K_h:
+            self.on_toggle_hint()
+        elif e.key == pygame.K_a:
+            self.on_toggle_bot()
         elif e.key == pygame.K_LEFT:
             self._begin_lr("left")
             self.on_move(-1, 0)
@@ -95,7 +127,7 @@ class InputManager:
         state["held"] = False
 
     def update(self, now_ms: int):
-        if self.is_paused() or self.is_game_over():
+        if self.is_paused() or self.is_game_over() or self.is_scrubbing():
             return
         for side in ("left", "right"):
             state = self.lr_state[side]
@@ -110,6 +142,23 @@ class InputManager:
             moved = self.on_move(dx, 0)
             state["last_repeat"] = now_ms if moved else now_ms
 
+    def next_deadline(self, now_ms: int) -> Optional[int]:
+        """Earliest tick at which `update` would auto-shift a held key, or None."""
+        if self.is_paused() or self.is_game_over() or self.is_scrubbing():
+            return None
+        deadline = None
+        for state in self.lr_state.values():
+            if not state["held"]:
+                continue
+            if now_ms - state["first"] < self.cfg["DAS_MS"]:
+                due = state["first"] + self.cfg["DAS_MS"]
+            elif state["last_repeat"]:
+                due = state["last_repeat"] + self.cfg["ARR_MS"]
+            else:
+                due = now_ms
+            deadline = due if deadline is None else min(deadline, due)
+        return deadline
+
     @property
     def soft_drop_active(self) -> bool:
         return self._down_held
@@ -0,0 +1,206 @@
+"""
+Precomputed placement table. For every surface profile - the height differences between
+neighbouring columns, each within +-bound - and every piece kind, the offline builder
+stores the placement the evaluator likes best on a hole-free board of that shape. At
+runtime the file is mmap'd read-only, so a decision is one index computation and one byte
+read, and any number of processes share the same physical pages.
+
+File layout (little endian):
+    header  magic, cols, bound, rows used while building, the four evaluation weights
+    body    one block per kind in KINDS order, base ** (cols - 1) bytes each, where
+            base = 2 * bound + 1. A byte packs (rot << 6) | (x + 2), or 0xFF when the
+            piece has no legal placement.
+
+Build one with `python -m src.lut build placements.lut --bound 2`, and use it in batch runs
+with the policy spec `NAME=lut:placements.lut` (src.tournament, src.stats).
+"""
+from __future__ import annotations
+import argparse
+import mmap
+import struct
+from multiprocessing import Pool
+from typing import List, Optional, Sequence, Tuple
+
+from .bag import KINDS
+from .board import Board
+from .bot import Weights, evaluate
+from .movegen import Placement, rotate, spawn
+from .piece import Piece
+
+MAGIC = b"TTRSLUT1"
+_HEADER = struct.Struct("<8sHHH4d")
+_KIND_INDEX = {k: i for i, k in enumerate(KINDS)}
+EMPTY = 0xFF
+
+
+def profile_index(heights: Sequence[int], bound: int) -> Optional[int]:
+    """Table index of a surface, or None when a step between columns exceeds `bound`."""
+    base = 2 * bound + 1
+    index, scale = 0, 1
+    for a, b in zip(heights, heights[1:]):
+        d = b - a
+        if d < -bound or d > bound:
+            return None
+        index += (d + bound) * scale
+        scale *= base
+    return index
+
+
+def profile_heights(index: int, cols: int, bound: int) -> List[int]:
+    """Inverse of profile_index, shifted so the lowest column has height 0."""
+    base = 2 * bound + 1
+    heights = [0]
+    for _ in range(cols - 1):
+        index, digit = divmod(index, base)
+        heights.append(heights[-1] + digit - bound)
+    low = min(heights)
+    return [h - low for h in heights]
+
+
+def surface_board(heights: Sequence[int], rows: int) -> Board:
+    board = Board(len(heights), rows)
+    board.fill((x, rows - 1 - i) for x, h in enumerate(heights) for i in range(h))
+    return board
+
+
+def _pack(rot: int, x: int) -> int:
+    return (rot << 6) | (x + 2)
+
+
+def _unpack(entry: int) -> Tuple[int, int]:
+    return entry >> 6, (entry & 0x3F) - 2
+
+
+# ----------------------------- building ------------------------------------
+def best_entry(board: Board, kind: str, weights: Weights) -> int:
+    """
+    Best straight drop from the spawn row for `kind`. On a hole-free surface every
+    reachable resting place is a straight drop, so this matches the full search.
+    """
+    start = spawn(kind, board.cols)
+    best, best_score = EMPTY, float("-inf")
+    for rot in range(4):
+        for x in range(-2, board.cols + 2):
+            p = Piece(kind, x, start.y, rot)
+            if not board.valid(p):
+                continue
+            p.y += board.drop_distance(p)
+            child = board.copy()
+            cleared = child.lock(p)
+            score = evaluate(child, cleared, weights)
+            if score > best_score:
+                best, best_score = _pack(rot, x), score
+    return best
+
+
+def _build_chunk(args) -> bytes:
+    kind, start, stop, cols, rows, bound, weights = args
+    out = bytearray()
+    for index in range(start, stop):
+        board = surface_board(profile_heights(index, cols, bound), rows)
+        out.append(best_entry(board, kind, weights))
+    return bytes(out)
+
+
+def build(
+    path: str,
+    cols: int = 10,
+    bound: int = 2,
+    weights: Weights = Weights(),
+    processes: Optional[int] = None,
+    chunk: int = 2048,
+):
+    """Write a table for `cols`-wide boards covering steps of up to +-bound."""
+    rows = (cols - 1) * bound + 6  # tallest profile plus room to spawn
+    count = (2 * bound + 1) ** (cols - 1)
+    tasks = [
+        (kind, start, min(start + chunk, count), cols, rows, bound, weights)
+        for kind in KINDS
+        for start in range(0, count, chunk)
+    ]
+    with open(path, "wb") as f, Pool(processes) as pool:
+        f.write(_HEADER.pack(MAGIC, cols, bound, rows, weights.height, weights.lines,
+                             weights.holes, weights.bumpiness))
+        for block in pool.imap(_build_chunk, tasks):
+            f.write(block)
+
+
+# ----------------------------- lookup --------------------------------------
+class PlacementTable:
+    """Read-only, memory-mapped view of a table written by `build`."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, cols, bound, rows, *weights = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a placement table")
+        self.cols, self.bound, self.rows = cols, bound, rows
+        self.weights = Weights(*weights)
+        self._stride = (2 * bound + 1) ** (cols - 1)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def entry(self, kind: str, index: int) -> int:
+        return self._map[_HEADER.size + _KIND_INDEX[kind] * self._stride + index]
+
+    def lookup(self, board: Board, piece: Piece) -> Optional[Placement]:
+        """The stored placement for this surface, routed from `piece`; None if not covered."""
+        if board.cols != self.cols:
+            return None
+        heights = board.column_heights()
+        # Entries were chosen on hole-free boards; with holes the rows that would clear differ
+        if board.filled() != sum(heights):
+            return None
+        index = profile_index(heights, self.bound)
+        if index is None:
+            return None
+        entry = self.entry(piece.kind, index)
+        if entry == EMPTY:
+            return None
+        return _route(board, piece, *_unpack(entry))
+
+
+def _route(board: Board, piece: Piece, rot: int, x: int) -> Optional[Placement]:
+    """Inputs taking `piece` to (rot, x) and down; None if anything is in the way."""
+    moves = []
+    cur = piece
+    turns = (rot - piece.rot) % 4
+    for dr in ([1] * turns if turns < 3 else [-1]):
+        nxt = rotate(board, cur, dr)
+        if nxt is None:
+            return None
+        cur = nxt
+        moves.append(("rotate", dr))
+    step = 1 if x > cur.x else -1
+    while cur.x != x:
+        nxt = Piece(cur.kind, cur.x + step, cur.y, cur.rot, cur.color)
+        if not board.valid(nxt):
+            return None
+        cur = nxt
+        moves.append(("move", step, 0))
+    return Placement(cur.kind, cur.x, cur.y + board.drop_distance(cur), cur.rot, tuple(moves))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.lut", description="Placement lookup table tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="enumerate surface profiles and write a table")
+    b.add_argument("path")
+    b.add_argument("--cols", type=int, default=10)
+    b.add_argument("--bound", type=int, default=2, help="largest height step between neighbouring columns")
+    b.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args(argv)
+    if args.cmd == "build":
+        build(args.path, cols=args.cols, bound=args.bound, processes=args.processes)
+        table = PlacementTable(args.path)
+        print(f"wrote {args.path}: {table.cols} cols, steps +-{table.bound}, {table._stride} profiles per kind")
+        table.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
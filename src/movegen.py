@@ -0,0 +1,272 @@
+from __future__ import annotations
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from .board import Board
+from .config import KICKS, SHAPES
+from .piece import Piece
+
+# ("move", dx, dy) or ("rotate", dr); replayed through Tetris._move/_rotate
+Move = Tuple
+State = Tuple[int, int, int]  # (x, y, rot)
+
+
+def spawn(kind: str, cols: int, color: Tuple[int, int, int] = (200, 200, 200)) -> Piece:
+    """Spawn position used by the game: centred, nudged one row down so every rotation fits."""
+    return Piece(kind, cols // 2, 1, 0, color)
+
+
+def rotate(board: Board, piece: Piece, dr: int) -> Optional[Piece]:
+    """Rotate with the game's naive kicks (see KICKS). None when blocked (or an O piece)."""
+    if piece.kind == "O":
+        return None
+    candidate = piece.rotated(dr)
+    for dx in KICKS:
+        test = Piece(candidate.kind, candidate.x + dx, candidate.y, candidate.rot, candidate.color)
+        if board.valid(test):
+            return test
+    return None
+
+
+@dataclass(frozen=True)
+class Placement:
+    """A final resting position plus the input sequence (before a hard drop) reaching it."""
+
+    kind: str
+    x: int
+    y: int
+    rot: int
+    moves: Tuple[Move, ...] = ()
+
+    def piece(self, color: Tuple[int, int, int] = (200, 200, 200)) -> Piece:
+        return Piece(self.kind, self.x, self.y, self.rot, color)
+
+    def cells(self) -> FrozenSet[Tuple[int, int]]:
+        return frozenset(self.piece().blocks())
+
+    @property
+    def top(self) -> int:
+        """Board y of the piece's highest cell."""
+        return self.y + _YSPAN[self.kind][self.rot][0]
+
+
+# --------------------------------------------------------------------------
+# Precomputed per-rotation row masks: for each (kind, rot) a list of
+# (dy, dx_min, bits) so a collision test is one shift-and-mask per piece row.
+def _shape_rows(kind: str, rot: int) -> Tuple[Tuple[int, int, int], ...]:
+    by_row: Dict[int, List[int]] = {}
+    for dx, dy in SHAPES[kind][rot]:
+        by_row.setdefault(dy, []).append(dx)
+    out = []
+    for dy, xs in sorted(by_row.items()):
+        lo = min(xs)
+        out.append((dy, lo, sum(1 << (x - lo) for x in xs)))
+    return tuple(out)
+
+
+_ROWS = {k: [_shape_rows(k, r) for r in range(4)] for k in SHAPES}
+_XSPAN = {k: [(min(dx for dx, _ in s), max(dx for dx, _ in s)) for s in SHAPES[k]] for k in SHAPES}
+_YSPAN = {k: [(min(dy for _, dy in s), max(dy for _, dy in s)) for s in SHAPES[k]] for k in SHAPES}
+
+
+def _shape_ids(kind: str) -> List[int]:
+    # rotations with the same cells up to translation (I/S/Z 0 and 2, all of O) share an id
+    ids: Dict[FrozenSet[Tuple[int, int]], int] = {}
+    out = []
+    for (lo, _), (top, _), shape in zip(_XSPAN[kind], _YSPAN[kind], SHAPES[kind]):
+        norm = frozenset((dx - lo, dy - top) for dx, dy in shape)
+        out.append(ids.setdefault(norm, len(ids)))
+    return out
+
+
+_SHAPE_ID = {k: _shape_ids(k) for k in SHAPES}
+
+
+def _cells_key(kind: str, x: int, y: int, rot: int) -> Tuple[int, int, int]:
+    """Hashable key equal for exactly those positions that occupy the same cells."""
+    return (_SHAPE_ID[kind][rot], x + _XSPAN[kind][rot][0], y + _YSPAN[kind][rot][0])
+
+
+class _Collider:
+    """Collision tests against a snapshot of rows y_lo..bottom; rows above y_lo are empty."""
+
+    def __init__(self, board: Board, kind: str, y_lo: int):
+        self.cols, self.rows, self.kind = board.cols, board.rows, kind
+        self.y_lo = y_lo
+        self.masks = [board.row_mask(y) for y in range(y_lo, board.rows)]
+
+    def free(self, x: int, y: int, rot: int) -> bool:
+        lo, hi = _XSPAN[self.kind][rot]
+        if x + lo < 0 or x + hi >= self.cols:
+            return False
+        top, bottom = _YSPAN[self.kind][rot]
+        if y + top < 0 or y + bottom >= self.rows:
+            return False
+        masks, y_lo = self.masks, self.y_lo
+        for dy, dx, bits in _ROWS[self.kind][rot]:
+            yy = y + dy - y_lo
+            if yy >= 0 and (masks[yy] >> (x + dx)) & bits:
+                return False
+        return True
+
+    def rotate(self, x: int, y: int, rot: int, dr: int) -> Optional[State]:
+        if self.kind == "O":
+            return None
+        r = (rot + dr) % 4
+        for dx in KICKS:
+            if self.free(x + dx, y, r):
+                return (x + dx, y, r)
+        return None
+
+
+def placements(board: Board, piece: Piece, with_moves: bool = True) -> List[Placement]:
+    """
+    Every distinct resting position reachable from `piece` with the game's own moves
+    (left/right, soft drop, rotation with kicks). Positions are deduplicated by occupied
+    cells, in a stable order.
+
+    With `with_moves` a breadth-first search records a shortest input sequence for each
+    position. Without it the same set is found by flood-filling bitboards of piece
+    anchors, one shift per move for all positions at once, which is much faster and is
+    what searches that only need the resulting boards should use.
+
+    Above the stack nothing can block a move, so a piece there drops straight to just
+    above the surface: either way the cost is O(width * stack height), not board area.
+    """
+    if not with_moves:
+        return _placements_bitboard(board, piece)
+    kind = piece.kind
+    surface = board.top_row
+    col = _Collider(board, kind, surface)
+    start = (piece.x, piece.y, piece.rot)
+    if not col.free(*start):
+        return []
+
+    parents: Dict[State, Tuple[Optional[State], Optional[Move]]] = {start: (None, None)}
+    queue = deque([start])
+    finals: List[State] = []
+    seen_cells = set()
+
+    def push(state: State, parent: State, move: Move):
+        if state not in parents:
+            parents[state] = (parent, move)
+            queue.append(state)
+
+    while queue:
+        x, y, rot = state = queue.popleft()
+        # down: jump through the empty rows above the stack in one step
+        enter = surface - 1 - _YSPAN[kind][rot][1]
+        if enter > y + 1:
+            push((x, enter, rot), state, ("move", 0, enter - y))
+        elif col.free(x, y + 1, rot):
+            push((x, y + 1, rot), state, ("move", 0, 1))
+        else:
+            cells = _cells_key(kind, x, y, rot)
+            if cells not in seen_cells:
+                seen_cells.add(cells)
+                finals.append(state)
+        for dx in (-1, 1):
+            if col.free(x + dx, y, rot):
+                push((x + dx, y, rot), state, ("move", dx, 0))
+        for dr in (-1, 1):
+            rotated = col.rotate(x, y, rot, dr)
+            if rotated is not None:
+                push(rotated, state, ("rotate", dr))
+
+    out = []
+    for state in finals:
+        path = []
+        node: Optional[State] = state
+        while node is not None:
+            node, move = parents[node]
+            if move is not None:
+                path.append(move)
+        out.append(Placement(kind, state[0], state[1], state[2], tuple(reversed(path))))
+    return out
+
+
+# --------------------------------------------------------------------------
+# Bitboard variant. Anchors (x, y) map to bit (y - y0) * W + x + _PAD; the padding
+# columns are never valid anchors, so shifting by a kick never wraps between rows.
+_PAD = 4
+
+
+def _placements_bitboard(board: Board, piece: Piece) -> List[Placement]:
+    kind, cols = piece.kind, board.cols
+    surface = board.top_row
+    width = cols + 2 * _PAD
+    # start as low as the empty rows above the stack allow (see the BFS above)
+    start_y = max(piece.y, surface - 1 - max(b for _, b in _YSPAN[kind]))
+    y0 = start_y - 1  # highest row a piece cell can reach
+    height = board.rows - y0
+
+    empty = 0
+    row_bits = ((1 << cols) - 1) << _PAD
+    for i in range(height):
+        y = y0 + i
+        if y >= 0:
+            empty |= (row_bits & ~(board.row_mask(y) << _PAD)) << (i * width)
+    anchors = 0  # rows an anchor may sit on: start_y and below
+    for i in range(1, height):
+        anchors |= ((1 << width) - 1) << (i * width)
+
+    rotations = range(len(SHAPES[kind]))
+    free = []
+    for rot in rotations:
+        f = anchors
+        for dx, dy in SHAPES[kind][rot]:
+            shift = dy * width + dx  # cell of the anchor at bit b sits at bit b + shift
+            f &= empty >> shift if shift >= 0 else empty << -shift
+        free.append(f)
+
+    start = 1 << (width + piece.x + _PAD)
+    if not free[piece.rot] & start:
+        return []
+    reach = [0] * 4
+    reach[piece.rot] = start
+    changed = True
+    while changed:
+        changed = False
+        for rot in rotations:
+            r, f = reach[rot], free[rot]
+            while True:
+                grown = r | (((r << 1) | (r >> 1) | (r << width)) & f)
+                if grown == r:
+                    break
+                r = grown
+            if r != reach[rot]:
+                reach[rot] = r
+                changed = True
+            if kind == "O":
+                continue
+            for dr in (-1, 1):
+                target = (rot + dr) % 4
+                pending, f2 = r, free[target]
+                gained = 0
+                for dx in KICKS:
+                    if dx >= 0:
+                        gained |= (pending << dx) & f2
+                        pending &= ~(f2 >> dx)
+                    else:
+                        gained |= (pending >> -dx) & f2
+                        pending &= ~(f2 << -dx)
+                if gained & ~reach[target]:
+                    reach[target] |= gained
+                    changed = True
+
+    out = []
+    seen_cells = set()
+    for rot in rotations:
+        resting = reach[rot] & ~(free[rot] >> width)
+        while resting:
+            low = resting & -resting
+            resting ^= low
+            bit = low.bit_length() - 1
+            y = y0 + bit // width
+            x = bit % width - _PAD
+            cells = _cells_key(kind, x, y, rot)
+            if cells not in seen_cells:
+                seen_cells.add(cells)
+                out.append(Placement(kind, x, y, rot))
+    return out
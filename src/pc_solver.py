@@ -0,0 +1,234 @@
+"""
+Perfect-clear search for low stacks. Given the board, the current piece and the known
+upcoming pieces (e.g. `SevenBag.peek`), find placements that empty the board, or prove
+that the queue cannot. There is no hold, so the piece order is fixed and a position is
+fully described by (row masks, pieces used, target height): dead positions are memoised
+on that key, and most branches die early on the checks in `_feasible`.
+
+Whether a position is dead depends only on the board, the target height and the pieces
+that follow, so `Solver` keeps its memo from one call to the next while the queue
+carries on where the last one started (the usual case: one piece placed, one more
+previewed) and every spawn resumes the proof instead of starting over. `AsyncSolver`
+runs that in a src.background worker for the in-game hint, so the frame loop never
+waits on it.
+"""
+from __future__ import annotations
+import time
+from typing import Callable, List, Optional, Sequence, Set, Tuple
+
+from .background import BackgroundWorker
+from .board import Board
+from .config import COLORS
+from .movegen import Placement, placements, spawn
+
+# Change in (filled even-column cells - filled odd-column cells) a piece can make.
+# I: 0 flat, +-4 upright; J/L: always +-2; T: 0 flat, +-2 upright; O/S/Z: always 0.
+_PARITY_MAX = {"I": 4, "J": 2, "L": 2, "T": 2, "O": 0, "S": 0, "Z": 0}
+
+
+# Memo entries kept before a Solver starts over
+_MEMO_LIMIT = 1 << 21
+
+
+class _Search:
+    def __init__(self, queue: Sequence[str], should_stop: Callable[[], bool]):
+        self.queue = list(queue)
+        self.should_stop = should_stop
+        # (row masks, piece index counted from the first queue ever searched, height)
+        self.dead: Set[Tuple[Tuple[int, ...], int, int]] = set()
+        self.base = 0  # pieces dropped from the front of the queue by `advance`
+
+    def advance(self, queue: Sequence[str]) -> bool:
+        """
+        Carry on with `queue` if it continues this search's queue from some offset:
+        drop the pieces before it and append the newly known ones. The memo counts
+        pieces from the first queue, so it carries over as it is.
+        """
+        old = self.queue
+        for skip in range(len(old)):
+            overlap = min(len(old) - skip, len(queue))
+            if old[skip:skip + overlap] == list(queue[:overlap]):
+                break
+        else:
+            return False
+        self.base += skip
+        self.queue = old[skip:] + list(queue[len(old) - skip:])
+        del self.queue[len(queue):]
+        return True
+
+    def _feasible(self, board: Board, depth: int, height: int) -> bool:
+        cols = board.cols
+        masks = board.key()
+        empty = cols * height - board.filled()
+        needed = empty // 4
+        if empty % 4:
+            return False
+        pieces = self.queue[depth:depth + needed]
+
+        # Column parity: each piece changes the even/odd column balance by a fixed set
+        # of amounts, and rows clearing doesn't move cells between columns.
+        even = sum(1 for x in range(0, cols, 2) for m in masks if not (m >> x) & 1)
+        even += (height - len(masks)) * ((cols + 1) // 2)
+        odd = empty - even
+        diff = even - odd
+        if abs(diff) > sum(_PARITY_MAX[k] for k in pieces):
+            return False
+        if "T" not in pieces:
+            jl = sum(1 for k in pieces if k in "JL")
+            if (diff - 2 * jl) % 4:
+                return False
+
+        # A column filled all the way up to the target height is a wall nothing can
+        # cross, even after line clears, so each side must hold whole pieces.
+        column_empty = [0] * cols
+        for x in range(cols):
+            column_empty[x] = height - sum(1 for m in masks if (m >> x) & 1)
+        segment = 0
+        for x in range(cols):
+            if column_empty[x] == 0:
+                if segment % 4:
+                    return False
+                segment = 0
+            else:
+                segment += column_empty[x]
+        if segment % 4:
+            return False
+        return True
+
+    def run(self, board: Board, depth: int, height: int) -> Optional[List[Placement]]:
+        if board.stack_height == 0 and depth > 0:
+            return []
+        if depth >= len(self.queue):
+            return None
+        key = (board.key(), self.base + depth, height)
+        if key in self.dead:
+            return None
+        if self.should_stop():
+            raise TimeoutError("perfect-clear search stopped")
+        if (board.cols * height - board.filled()) // 4 > len(self.queue) - depth:
+            # Not dead, just past the pieces known so far: a longer queue may finish it
+            return None
+        if not self._feasible(board, depth, height):
+            self.dead.add(key)
+            return None
+
+        kind = self.queue[depth]
+        limit = board.rows - height  # cells must stay at y >= limit
+        seen = set()
+        for placement in placements(board, spawn(kind, board.cols), with_moves=False):
+            if placement.top < limit:
+                continue
+            child = board.copy()
+            cleared = child.lock(placement.piece(COLORS[kind]))
+            child_key = child.key()
+            if child_key in seen:
+                continue
+            seen.add(child_key)
+            rest = self.run(child, depth + 1, height - cleared)
+            if rest is not None:
+                return [placement] + rest
+        self.dead.add(key)
+        return None
+
+
+class Solver:
+    """`solve` that remembers the positions it has proven dead (see the module docstring)."""
+
+    def __init__(self, max_height: int = 4):
+        self.max_height = max_height
+        self._search: Optional[_Search] = None
+
+    def solve(
+        self,
+        board: Board,
+        queue: Sequence[str],
+        should_stop: Callable[[], bool] = lambda: False,
+    ) -> Optional[List[Placement]]:
+        """
+        Placements that empty the board using the pieces of `queue` in order (current
+        piece first), or None when no perfect clear within `max_height` rows exists.
+        Raises TimeoutError as soon as `should_stop()` returns true.
+        """
+        if board.stack_height > self.max_height:
+            return None
+        search = self._search
+        if search is None or len(search.dead) > _MEMO_LIMIT or not search.advance(queue):
+            search = self._search = _Search(queue, should_stop)
+        search.should_stop = should_stop
+        filled = board.filled()
+        for height in range(max(1, board.stack_height), self.max_height + 1):
+            empty = board.cols * height - filled
+            if empty % 4 or empty // 4 > len(queue):
+                continue
+            result = search.run(board, 0, height)
+            if result is not None:
+                return _with_moves(board, result)
+        return None
+
+
+def solve(
+    board: Board,
+    queue: Sequence[str],
+    max_height: int = 4,
+    timeout: Optional[float] = None,
+) -> Optional[List[Placement]]:
+    """
+    Placements (one per piece, in queue order, starting with the current piece) that
+    leave the board empty - on an empty board, fill it and clear it again - or None when
+    no perfect clear within `max_height` rows exists for this queue. Raises TimeoutError
+    if `timeout` seconds pass first.
+    """
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    should_stop = (lambda: False) if deadline is None else (lambda: time.perf_counter() > deadline)
+    return Solver(max_height).solve(board, queue, should_stop)
+
+
+def _with_moves(board: Board, solution: List[Placement]) -> List[Placement]:
+    """Attach input sequences to a solution found without them."""
+    board = board.copy()
+    out = []
+    for placement in solution:
+        cells = placement.cells()
+        found = placements(board, spawn(placement.kind, board.cols))
+        out.append(next(p for p in found if p.cells() == cells))
+        board.lock(placement.piece(COLORS[placement.kind]))
+    return out
+
+
+# ----------------------------- background ----------------------------------
+class _Solve:
+    """Worker side: one Solver for the worker's whole life, so its memo carries over."""
+
+    def __init__(self, max_height: int):
+        self.solver = Solver(max_height)
+
+    def __call__(self, payload, should_stop, reply):
+        board, queue = payload
+        try:
+            reply(self.solver.solve(board, queue, should_stop))
+        except TimeoutError:
+            pass  # superseded; what was proven so far stays in the memo
+
+
+class AsyncSolver(BackgroundWorker):
+    """Game-side handle: post positions with `think`, collect plans with `poll`."""
+
+    def __init__(self, max_height: int = 4):
+        super().__init__(_Solve(max_height))
+        self.busy = False
+
+    def think(self, board: Board, queue: Sequence[str]):
+        """Search `board` with `queue` (current piece first); any earlier search stops."""
+        self.busy = True
+        self.post((board.copy(), list(queue)))
+
+    def cancel(self):
+        super().cancel()
+        self.busy = False
+
+    def poll(self) -> Tuple[Optional[List[Placement]], bool]:
+        """(plan, whether the latest search has finished); the plan is None without a perfect clear."""
+        for plan in self.replies():
+            self.busy = False
+            return plan, True
+        return None, False
@@ -0,0 +1,205 @@
+"""
+Placement perft, after the chess move-generation test. From a fixed position and piece
+sequence, count for every depth d <= N
+
+    paths   sequences of d placements (distinct resting cells per piece)
+    boards  distinct boards left after d placements, line clears applied
+
+using the game's movement: left/right, soft drop and rotation with `movegen.rotate`'s
+kicks (what `Tetris._rotate` plays). Boards are expanded once per depth however many
+paths reach them, and paths are carried as multiplicities, so deep counts stay cheap.
+
+The counts below were produced by the `reference` generator - a plain search over
+(x, y, rot) with `Board.valid`, no tables or bitboards - and act as the oracle for
+changes to Board, Piece or movegen: `--verify` fails when any generator disagrees.
+
+Usage: python -m src.perft --position overhang --depth 3 --movegen bitboard --verify
+       python -m src.perft --depth 4 --processes 4
+"""
+from __future__ import annotations
+import argparse
+import time
+from collections import deque
+from multiprocessing import Pool
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from .board import Board
+from .config import COLORS
+from .movegen import Placement, placements, rotate, spawn
+from .piece import Piece
+
+Generator = Callable[[Board, Piece], List[Placement]]
+
+# name: (cols, rows, rows from the top of the stack down to the floor, piece sequence)
+POSITIONS: Dict[str, Tuple[int, int, Tuple[str, ...], str]] = {
+    "empty": (10, 20, (), "TIOLJSZ"),
+    "overhang": (10, 20, (
+        "X.........",
+        "XX....XXXX",
+        "XXX..XXXXX",
+        "XXXX.XXXXX",
+    ), "TSZLJIO"),
+    "narrow": (6, 12, (
+        "......",
+        "X.XX..",
+        "XX.XX.",
+    ), "ZTISOLJ"),
+}
+
+# position -> [(paths, boards) at depth 1, 2, 3], from the reference generator
+REFERENCE: Dict[str, List[Tuple[int, int]]] = {
+    "empty": [(34, 34), (596, 596), (5542, 5542)],
+    "overhang": [(34, 34), (602, 602), (11050, 11050)],
+    "narrow": [(9, 9), (169, 169), (1559, 1558)],
+}
+
+
+def make_board(name: str) -> Tuple[Board, str]:
+    cols, rows, picture, queue = POSITIONS[name]
+    board = Board(cols, rows)
+    top = rows - len(picture)
+    board.fill((x, top + i) for i, line in enumerate(picture) for x, ch in enumerate(line) if ch == "X")
+    return board, queue
+
+
+def reference_placements(board: Board, piece: Piece) -> List[Placement]:
+    """Straightforward search over single moves, checked with Board.valid only."""
+    if not board.valid(piece):
+        return []
+    start = (piece.x, piece.y, piece.rot)
+    seen = {start}
+    queue = deque([start])
+    finals: Dict[frozenset, Placement] = {}
+    while queue:
+        x, y, rot = queue.popleft()
+        cur = Piece(piece.kind, x, y, rot)
+        nexts = []
+        for dx, dy in ((-1, 0), (1, 0), (0, 1)):
+            moved = Piece(piece.kind, x + dx, y + dy, rot)
+            if board.valid(moved):
+                nexts.append(moved)
+            elif dy:
+                cells = frozenset(cur.blocks())
+                finals.setdefault(cells, Placement(piece.kind, x, y, rot))
+        for dr in (-1, 1):
+            rotated = rotate(board, cur, dr)
+            if rotated is not None:
+                nexts.append(rotated)
+        for p in nexts:
+            state = (p.x, p.y, p.rot)
+            if state not in seen:
+                seen.add(state)
+                queue.append(state)
+    return list(finals.values())
+
+
+GENERATORS: Dict[str, Generator] = {
+    "reference": reference_placements,
+    "bfs": lambda board, piece: placements(board, piece),
+    "bitboard": lambda board, piece: placements(board, piece, with_moves=False),
+}
+
+
+def _expand(
+    frontier: Dict[Tuple[int, ...], Tuple[Board, int]],
+    kind: str,
+    generate: Generator,
+) -> Tuple[Dict[Tuple[int, ...], Tuple[Board, int]], int]:
+    """Next depth's distinct boards with their path counts, and how many placements were generated."""
+    out: Dict[Tuple[int, ...], Tuple[Board, int]] = {}
+    nodes = 0
+    for board, paths in frontier.values():
+        moves = generate(board, spawn(kind, board.cols))
+        nodes += len(moves)
+        for placement in moves:
+            child = board.copy()
+            child.lock(placement.piece(COLORS[kind]))
+            key = child.key()
+            if key in out:
+                out[key] = (out[key][0], out[key][1] + paths)
+            else:
+                out[key] = (child, paths)
+    return out, nodes
+
+
+def perft(
+    board: Board,
+    queue: str,
+    depth: int,
+    movegen: str = "bitboard",
+) -> Tuple[List[int], List[Set[Tuple[int, ...]]], int]:
+    """(paths per depth, distinct board keys per depth, placements generated)."""
+    generate = GENERATORS[movegen]
+    frontier = {board.key(): (board, 1)}
+    paths, boards, nodes = [], [], 0
+    for d in range(depth):
+        frontier, generated = _expand(frontier, queue[d % len(queue)], generate)
+        nodes += generated
+        paths.append(sum(p for _, p in frontier.values()))
+        boards.append(set(frontier))
+    return paths, boards, nodes
+
+
+def _perft_subtree(args):
+    name, first, depth, movegen = args
+    board, queue = make_board(name)
+    kind = queue[0]
+    board.lock(first.piece(COLORS[kind]))
+    return perft(board, queue[1:] + queue[:1], depth - 1, movegen)
+
+
+def run(name: str, depth: int, movegen: str, processes: int = 1):
+    """Per-depth (paths, boards), placements generated and seconds taken for a position."""
+    board, queue = make_board(name)
+    start = time.perf_counter()
+    if processes <= 1 or depth < 2:
+        paths, boards, nodes = perft(board, queue, depth, movegen)
+    else:
+        # Split on the first placement; subtrees can reach the same boards, so the
+        # distinct sets are merged rather than their sizes added.
+        roots = GENERATORS[movegen](board, spawn(queue[0], board.cols))
+        paths, boards, nodes = [len(roots)], [set()], len(roots)
+        for placement in roots:
+            child = board.copy()
+            child.lock(placement.piece(COLORS[queue[0]]))
+            boards[0].add(child.key())
+        paths += [0] * (depth - 1)
+        boards += [set() for _ in range(depth - 1)]
+        with Pool(processes) as pool:
+            tasks = [(name, placement, depth, movegen) for placement in roots]
+            for sub_paths, sub_boards, sub_nodes in pool.imap_unordered(_perft_subtree, tasks):
+                nodes += sub_nodes
+                for d, (p, b) in enumerate(zip(sub_paths, sub_boards), 1):
+                    paths[d] += p
+                    boards[d] |= b
+    elapsed = time.perf_counter() - start
+    return [(p, len(b)) for p, b in zip(paths, boards)], nodes, elapsed
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.perft", description="Count reachable placements and boards")
+    parser.add_argument("--position", choices=sorted(POSITIONS), action="append",
+                        help="position to count from (repeatable; default: all)")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--movegen", choices=sorted(GENERATORS), default="bitboard")
+    parser.add_argument("--processes", type=int, default=1, help="split the first placement across processes")
+    parser.add_argument("--verify", action="store_true", help="compare with the reference counts; exit 1 on mismatch")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for name in args.position or sorted(POSITIONS):
+        counts, nodes, elapsed = run(name, args.depth, args.movegen, args.processes)
+        print(f"{name} ({args.movegen}, {nodes} placements in {elapsed:.2f}s, {nodes / max(elapsed, 1e-9):,.0f}/s)")
+        expected = REFERENCE.get(name, [])
+        for d, (paths, boards) in enumerate(counts, 1):
+            line = f"  depth {d}: {paths:>12} paths {boards:>12} boards"
+            if args.verify and d <= len(expected):
+                ok = (paths, boards) == expected[d - 1]
+                failed |= not ok
+                line += "  ok" if ok else f"  MISMATCH, expected {expected[d - 1]}"
+            print(line)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
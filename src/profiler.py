@@ -0,0 +1,303 @@
+"""
+Deterministic profiling harness. Plays a fixed set of seeded games through the real
+`Tetris` object (headless, via SDL's dummy video/audio drivers): every input goes
+through the InputManager callbacks followed by one `Tetris.tick` (update, gravity,
+redraw), on a simulated clock that advances one frame per tick, so gravity lands the
+same way every run. Profiles of Board/Piece/Renderer changes can be reproduced and
+compared between commits; frames are named module.qualname, without line numbers,
+so the same function keeps its name when code above it moves.
+
+Outputs (in --out):
+    profile.pstats     raw cProfile data, loadable with `pstats`/snakeviz
+    profile.collapsed  collapsed stacks for flamegraph.pl / speedscope / inferno
+    summary.json       per-game counts, top functions by self time, allocations
+"""
+from __future__ import annotations
+import argparse
+import ast
+import cProfile
+import functools
+import json
+import pstats
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .cli import use_dummy_drivers
+from .config import CONFIG
+from .piece import Piece
+
+FuncKey = Tuple[str, int, str]
+
+
+def _choose(game) -> Tuple[int, int]:
+    """
+    Fixed placement policy: lowest landing spot, leftmost on ties. Deliberately dumb
+    and deterministic so runs stay comparable; it is excluded from the profile.
+    """
+    board, cur = game.board, game.cur
+    best: Optional[Tuple[int, int, int, int]] = None
+    for rot in range(4):
+        for x in range(-2, board.cols + 2):
+            p = Piece(cur.kind, x, cur.y, (cur.rot + rot) % 4, cur.color)
+            if not board.valid(p):
+                continue
+            p.y += board.drop_distance(p)
+            bottom = max(y for (_, y) in p.blocks())
+            top = min(y for (_, y) in p.blocks())
+            key = (bottom, top, -x, -rot)
+            if best is None or key > best:
+                best = key
+    if best is None:
+        return 0, cur.x
+    return -best[3], -best[2]
+
+
+class SimulatedClock:
+    """Millisecond clock for `Tetris(ticks=...)` that only moves when told to."""
+
+    def __init__(self):
+        self.ms = 0
+
+    def __call__(self) -> int:
+        return self.ms
+
+
+def play_seeded_game(game, clock: SimulatedClock, pieces: int, prof: Optional[cProfile.Profile] = None) -> int:
+    """
+    Place up to `pieces` pieces (or until top-out). Each input is sent through
+    `game.inputs` and followed by a tick one frame later. Returns the placed count.
+    """
+    frame = 1000 // CONFIG["FPS"]
+    inputs = game.inputs
+    placed = 0
+    while placed < pieces and not game.game_over:
+        rot, target = _choose(game)
+        if prof:
+            prof.enable()
+        step = 1 if target > game.cur.x else -1
+        actions = [functools.partial(inputs.on_rotate, 1)] * rot
+        actions += [functools.partial(inputs.on_move, step, 0)] * abs(target - game.cur.x)
+        actions.append(inputs.on_hard_drop)
+        for action in actions:
+            action()
+            clock.ms += frame
+            game.tick([], limit_fps=False)
+        if prof:
+            prof.disable()
+        placed += 1
+    return placed
+
+
+# ----------------------------- collapsed stacks -----------------------------
+@functools.lru_cache(maxsize=None)
+def _definitions(filename: str) -> Tuple[Tuple[int, int, int, str], ...]:
+    """(first line incl. decorators, def line, last line, qualname) of every function in a file."""
+    try:
+        with open(filename) as f:
+            tree = ast.parse(f.read())
+    except (OSError, SyntaxError, ValueError):
+        return ()
+    out = []
+
+    def visit(node, prefix: str):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                first = min([child.lineno] + [d.lineno for d in child.decorator_list])
+                qualname = prefix + child.name
+                out.append((first, child.lineno, child.end_lineno or child.lineno, qualname))
+                visit(child, qualname + ".<locals>.")
+            elif isinstance(child, ast.ClassDef):
+                visit(child, prefix + child.name + ".")
+            else:
+                visit(child, prefix)
+
+    visit(tree, "")
+    return tuple(out)
+
+
+def _qualname(func: FuncKey) -> str:
+    """Qualified name of a profiled function; cProfile itself only records the bare name."""
+    filename, line, name = func
+    enclosing = ""
+    for first, def_line, last, qualname in _definitions(filename):
+        if line in (first, def_line) and name in (qualname, qualname.rpartition(".")[2]):
+            return qualname
+        if first <= line <= last and len(qualname) > len(enclosing):
+            enclosing = qualname  # innermost function around a lambda or comprehension
+    return f"{enclosing}.{name}" if enclosing and name.startswith("<") else name
+
+
+def _labels(funcs) -> Dict[FuncKey, str]:
+    """Stable frame names: module.qualname, with the line added only where two functions share one."""
+    labels = {}
+    for func in funcs:
+        filename, _, name = func
+        labels[func] = name if filename == "~" else f"{Path(filename).stem}.{_qualname(func)}"
+    taken = Counter(labels.values())
+    for func, label in labels.items():
+        if taken[label] > 1:
+            labels[func] = f"{label}:{func[1]}"
+    return {func: label.replace(";", ",").replace(" ", "_") for func, label in labels.items()}
+
+
+def _is_profiler(func: FuncKey) -> bool:
+    # enable()/disable() bracket every placement; their own cost is noise
+    return func[0] == "~" and "_lsprof.Profiler" in func[2]
+
+
+def collapsed_stacks(stats: pstats.Stats, min_fraction: float = 1e-4) -> Dict[str, int]:
+    """
+    Rebuild approximate call stacks from cProfile's caller graph. cProfile only keeps
+    caller->callee edges, so each function's self time is split over its callers in
+    proportion to the time spent on each edge, recursively up to the roots. Values are
+    microseconds of self time, in the `a;b;c value` format flamegraph tools expect.
+    """
+    raw = stats.stats  # type: ignore[attr-defined]
+    memo: Dict[FuncKey, List[Tuple[Tuple[FuncKey, ...], float]]] = {}
+
+    def paths(func: FuncKey, active: frozenset) -> List[Tuple[Tuple[FuncKey, ...], float]]:
+        if func in memo:
+            return memo[func]
+        callers = {c: e for c, e in raw[func][4].items() if c not in active and c in raw}
+        total = sum(e[3] for e in callers.values())
+        if not callers or total <= 0:
+            result = [((func,), 1.0)]
+        else:
+            result = []
+            for caller, edge in callers.items():
+                share = edge[3] / total
+                for path, frac in paths(caller, active | {func}):
+                    if frac * share >= min_fraction:
+                        result.append((path + (func,), frac * share))
+        if not active:
+            memo[func] = result
+        return result
+
+    labels = _labels(raw)
+    out: Dict[str, int] = {}
+    for func, (_, _, tt, _, _) in raw.items():
+        if tt <= 0 or _is_profiler(func):
+            continue
+        for path, frac in paths(func, frozenset()):
+            us = int(round(tt * frac * 1e6))
+            if us:
+                key = ";".join(labels[f] for f in path)
+                out[key] = out.get(key, 0) + us
+    return out
+
+
+def top_self_time(stats: pstats.Stats, n: int) -> List[dict]:
+    raw = stats.stats  # type: ignore[attr-defined]
+    labels = _labels(raw)
+    rows = [kv for kv in raw.items() if not _is_profiler(kv[0])]
+    rows = sorted(rows, key=lambda kv: kv[1][2], reverse=True)[:n]
+    return [
+        {"function": labels[func], "calls": nc, "self_s": round(tt, 6), "cum_s": round(ct, 6)}
+        for func, (_, nc, tt, ct, _) in rows
+    ]
+
+
+# ----------------------------- runs -----------------------------------------
+def run_profile(seeds: Sequence[int], pieces: int, cols=None, rows=None) -> Tuple[cProfile.Profile, List[dict]]:
+    from .game import Tetris
+
+    prof = cProfile.Profile()
+    games = []
+    for seed in seeds:
+        clock = SimulatedClock()
+        game = Tetris(cols, rows, seed=seed, ticks=clock)
+        placed = play_seeded_game(game, clock, pieces, prof)
+        games.append({"seed": seed, "pieces": placed, "lines": game.lines, "score": game.score})
+    return prof, games
+
+
+def run_allocations(seeds: Sequence[int], pieces: int, top: int, cols=None, rows=None) -> dict:
+    """
+    Replay the same games under tracemalloc (separately from cProfile so neither skews
+    the other) and report net allocations still live per placed piece, by call site.
+    """
+    from .game import Tetris
+
+    placed = 0
+    size = count = 0
+    sites: Dict[str, List[int]] = {}
+    tracemalloc.start(1)
+    try:
+        for seed in seeds:
+            clock = SimulatedClock()
+            game = Tetris(cols, rows, seed=seed, ticks=clock)
+            before = tracemalloc.take_snapshot()
+            n = play_seeded_game(game, clock, pieces)
+            after = tracemalloc.take_snapshot()
+            placed += n
+            for d in after.compare_to(before, "lineno"):
+                size += d.size_diff
+                count += d.count_diff
+                site = str(d.traceback)
+                acc = sites.setdefault(site, [0, 0])
+                acc[0] += d.size_diff
+                acc[1] += d.count_diff
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    per = max(placed, 1)
+    ranked = sorted(sites.items(), key=lambda kv: abs(kv[1][0]), reverse=True)[:top]
+    return {
+        "pieces": placed,
+        "bytes_per_piece": round(size / per, 2),
+        "blocks_per_piece": round(count / per, 4),
+        "peak_bytes": peak,
+        "top_sites": [
+            {"site": site, "bytes_per_piece": round(b / per, 2), "blocks_per_piece": round(c / per, 4)}
+            for site, (b, c) in ranked
+        ],
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="tetris.py --profile", description="Deterministic headless profiling run")
+    parser.add_argument("--games", type=int, default=5, help="number of seeded games (seeds 0..N-1)")
+    parser.add_argument("--pieces", type=int, default=200, help="piece cap per game")
+    parser.add_argument("--top", type=int, default=25, help="rows in the top-N tables")
+    parser.add_argument("--cols", type=int, default=None)
+    parser.add_argument("--rows", type=int, default=None)
+    parser.add_argument("--trace-alloc", action="store_true", help="also replay under tracemalloc")
+    parser.add_argument("--out", default="profile_out", help="output directory")
+    args = parser.parse_args(argv)
+
+    use_dummy_drivers()
+    seeds = list(range(args.games))
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+
+    prof, games = run_profile(seeds, args.pieces, args.cols, args.rows)
+    prof.dump_stats(out / "profile.pstats")
+    stats = pstats.Stats(prof)
+    with open(out / "profile.collapsed", "w") as f:
+        for stack, us in sorted(collapsed_stacks(stats).items()):
+            f.write(f"{stack} {us}\n")
+
+    placed = sum(g["pieces"] for g in games)
+    summary = {
+        "seeds": seeds,
+        "games": games,
+        "pieces": placed,
+        "total_s": round(stats.total_tt, 6),  # type: ignore[attr-defined]
+        "us_per_piece": round(stats.total_tt * 1e6 / max(placed, 1), 2),  # type: ignore[attr-defined]
+        "top_self_time": top_self_time(stats, args.top),
+    }
+    if args.trace_alloc:
+        summary["allocations"] = run_allocations(seeds, args.pieces, args.top, args.cols, args.rows)
+    with open(out / "summary.json", "w") as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"{placed} pieces in {len(games)} games, {summary['us_per_piece']} us/piece")
+    for row in summary["top_self_time"]:
+        print(f"  {row['self_s']:>10.6f}s  {row['calls']:>8}  {row['function']}")
+    if args.trace_alloc:
+        alloc = summary["allocations"]
+        print(f"allocations: {alloc['bytes_per_piece']} B/piece, {alloc['blocks_per_piece']} blocks/piece net")
+    print(f"wrote {out}/profile.pstats, profile.collapsed, summary.json")
+    return 0
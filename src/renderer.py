@@ -2,36 +2,126 @@ import math
 import random
 import sys
 from dataclasses import dataclass, field
-from typing import List, Tuple, Union
+from typing import List, Optional, Tuple, Union
 from .board import Board
 
 import pygame
-from .config import COLORS
+from .config import COLORS, CONFIG
 from .piece import Piece
 
+try:  # pygame.surfarray needs numpy; without it we keep the per-cell drawing path
+    import numpy
+except ImportError:
+    numpy = None
+
+# Offsets added to a cell's palette index for pixels on its outline (_OUTLINE) and on
+# its top/left grid line (_GRIDLINE); see Renderer._init_indexed.
+_OUTLINE, _GRIDLINE = 64, 128
+
+
 class Renderer:
-    def __init__(self, screen: pygame.Surface, cell: int):
+    def __init__(self, screen: pygame.Surface, cell: int, view_rows: Union[int, None] = None):
         self.screen = screen
         self.cell = cell
+        # Scrolling viewport: only rows [view_top, view_top + view_rows) are drawn.
+        self.view_rows = view_rows if view_rows is not None else screen.get_height() // cell
+        self.view_top = 0
         self.font = pygame.font.SysFont("Inter, Menlo, Consolas, Arial", 18)
         self.big = pygame.font.SysFont("Inter, Menlo, Consolas, Arial", 28, bold=True)
+        self.indexed = CONFIG["INDEXED_BOARD"] and numpy is not None
+        self._indexed_size = None
+        self._indexed_key = None
+
+    def follow(self, piece: Piece, board: Board, margin: int = 4):
+        """Scroll the viewport so the piece (plus a few rows of context) stays visible."""
+        max_top = max(0, board.rows - self.view_rows)
+        ys = [y for (_, y) in piece.blocks()]
+        top, bottom = min(ys) - margin, max(ys) + margin
+        if top < self.view_top:
+            self.view_top = top
+        elif bottom >= self.view_top + self.view_rows:
+            self.view_top = bottom - self.view_rows + 1
+        self.view_top = max(0, min(self.view_top, max_top))
 
     def draw_board(self, board: Board):
-        w, h = board.cols * self.cell, board.rows * self.cell
+        if self.indexed:
+            self._draw_board_indexed(board)
+            return
+        rows = min(self.view_rows, board.rows)
+        w, h = board.cols * self.cell, rows * self.cell
         pygame.draw.rect(self.screen, COLORS["bg"], (0, 0, w, h))
         # grid lines
         for x in range(board.cols + 1):
             pygame.draw.line(self.screen, COLORS["grid"], (x * self.cell, 0), (x * self.cell, h))
-        for y in range(board.rows + 1):
+        for y in range(rows + 1):
             pygame.draw.line(self.screen, COLORS["grid"], (0, y * self.cell), (w, y * self.cell))
-        # locked blocks
-        for y in range(board.rows):
-            for x in range(board.cols):
-                c = board.grid[y][x]
-                if c is not None:
-                    self._cell(x, y, c)
+        # locked blocks, visible and non-empty rows only
+        for y in board.occupied_rows(self.view_top, self.view_top + rows):
+            for x, c in board.row_cells(y):
+                self._cell(x, y, c)
+
+    # ----------------------- palette-indexed board -------------------
+    def _init_indexed(self, cols: int, rows: int):
+        """
+        Board pixels are palette indices: the cell's colour index (0 == empty) plus
+        _OUTLINE or _GRIDLINE for pixels on its border. The palette maps each of those
+        to what `_cell` and the grid lines would have drawn there, so a frame is an
+        upscale of a cols x rows index image, one add of a fixed border pattern and a
+        single blit, however many cells are filled.
+        """
+        c = self.cell
+        self._cells = pygame.Surface((cols, rows), depth=8)
+        self._pixels = pygame.Surface((cols * c, rows * c), depth=8)
+        self._color_index = {}
+        self._palette = [(0, 0, 0)] * 256
+        self._set_palette_entry(0, COLORS["bg"])
+        for kind in "IJLOSTZ":
+            self._palette_index(COLORS[kind])
+
+        edge = numpy.zeros(c, dtype=numpy.uint8)
+        edge[[0, 1, c - 2, c - 1]] = 1
+        tile = numpy.where(edge[:, None] | edge[None, :], _OUTLINE, 0).astype(numpy.uint8)
+        tile[0, :] = tile[:, 0] = _GRIDLINE
+        self._pattern = numpy.tile(tile, (cols, rows))
+        self._indexed_size = (cols, rows)
+        self._indexed_key = None
+
+    def _set_palette_entry(self, index: int, color: Tuple[int, int, int]):
+        self._palette[index] = color
+        self._palette[index + _OUTLINE] = (0, 0, 0) if index else COLORS["bg"]
+        self._palette[index + _GRIDLINE] = (0, 0, 0) if index else COLORS["grid"]
+        self._pixels.set_palette(self._palette)
+
+    def _palette_index(self, color: Tuple[int, int, int]) -> int:
+        index = self._color_index.get(color)
+        if index is None:
+            index = min(len(self._color_index) + 1, _OUTLINE - 1)
+            self._color_index[color] = index
+            self._set_palette_entry(index, color)
+        return index
+
+    def _draw_board_indexed(self, board: Board):
+        rows = min(self.view_rows, board.rows)
+        if self._indexed_size != (board.cols, rows):
+            self._init_indexed(board.cols, rows)
+        key = (id(board), board.version, self.view_top)
+        if key != self._indexed_key:
+            self._indexed_key = key
+            cells = pygame.surfarray.pixels2d(self._cells)
+            cells[:] = 0
+            for y in board.occupied_rows(self.view_top, self.view_top + rows):
+                for x, c in board.row_cells(y):
+                    cells[x, y - self.view_top] = self._palette_index(c)
+            c = self.cell
+            pixels = cells.repeat(c, axis=0).repeat(c, axis=1) + self._pattern
+            del cells  # release the surface lock
+            pygame.surfarray.blit_array(self._pixels, pixels)
+        self.screen.blit(self._pixels, (0, 0))
 
     def _cell(self, x: int, y: int, color: Tuple[int,int,int], alpha: Union[int,None]=None):
+        y -= self.view_top
+        if not 0 <= y < self.view_rows:
+            return
         r = pygame.Rect(x * self.cell, y * self.cell, self.cell, self.cell)
         pygame.draw.rect(self.screen, color, r)
         # outline
@@ -45,10 +135,29 @@ class Renderer:
         dy = board.drop_distance(piece)
         ghost = Piece(piece.kind, piece.x, piece.y + dy, piece.rot, COLORS["ghost"])
         for (x, y) in ghost.blocks():
+            y -= self.view_top
+            if not 0 <= y < self.view_rows:
+                continue
             r = pygame.Rect(x * self.cell + 4, y * self.cell + 4, self.cell - 8, self.cell - 8)
             pygame.draw.rect(self.screen, COLORS["ghost"], r, 2)
 
-    def hud(self, score: int, level: int, lines: int, paused: bool, game_over: bool):
+    def draw_hint(self, piece: Piece):
+        for (x, y) in piece.blocks():
+            y -= self.view_top
+            if not 0 <= y < self.view_rows:
+                continue
+            r = pygame.Rect(x * self.cell + 8, y * self.cell + 8, self.cell - 16, self.cell - 16)
+            pygame.draw.rect(self.screen, COLORS["hint"], r, 2)
+
+    def hud(
+        self,
+        score: int,
+        level: int,
+        lines: int,
+        paused: bool,
+        game_over: bool,
+        rewind: Optional[Tuple[int, int]] = None,
+    ):
         texts = [
             f"Score: {score}",
             f"Level: {level}",
@@ -56,6 +165,8 @@ class Renderer:
         ]
         if paused:
             texts.append("PAUSED (P)")
+        if rewind is not None:
+            texts.append(f"REWIND {rewind[0]}/{rewind[1]} (T)")
         if game_over:
             texts.append("GAME OVER — R to restart")
         y = 8
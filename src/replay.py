@@ -0,0 +1,99 @@
+from __future__ import annotations
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from .bag import SevenBag
+from .board import Board
+from .bot import Bot, Weights
+from .config import COLORS, CONFIG
+from .movegen import Placement, spawn
+
+
+@dataclass
+class Replay:
+    """A seed plus every placement made: enough to re-run a game exactly."""
+
+    seed: int
+    cols: int
+    rows: int
+    placements: List[Placement] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "seed": self.seed,
+            "cols": self.cols,
+            "rows": self.rows,
+            "placements": [[p.kind, p.x, p.y, p.rot, [list(m) for m in p.moves]] for p in self.placements],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Replay":
+        placements = [
+            Placement(kind, x, y, rot, tuple(tuple(m) for m in moves))
+            for kind, x, y, rot, moves in data["placements"]
+        ]
+        return cls(data["seed"], data["cols"], data["rows"], placements)
+
+    def save(self, path: str | Path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Replay":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def record_bot_game(
+    seed: int,
+    pieces: int,
+    cols: Optional[int] = None,
+    rows: Optional[int] = None,
+    weights: Weights = Weights(),
+) -> Replay:
+    """Let the heuristic bot play a seeded game (no pygame involved) and record it."""
+    cols = cols if cols is not None else CONFIG["COLS"]
+    rows = rows if rows is not None else CONFIG["ROWS"]
+    board, bag, bot = Board(cols, rows), SevenBag(seed), Bot(weights)
+    replay = Replay(seed, cols, rows)
+    for _ in range(pieces):
+        kind = bag.next()
+        piece = spawn(kind, cols, COLORS[kind])
+        if not board.valid(piece):
+            break
+        placement = bot.choose(board, piece)
+        if placement is None:
+            break
+        board.lock(placement.piece(COLORS[kind]))
+        replay.placements.append(placement)
+    return replay
+
+
+def steps(game, replay: Replay) -> Iterator[int]:
+    """
+    Drive a Tetris built with the replay's seed and size through every recorded input,
+    yielding once before each placement's first input, once after every input, and
+    once after the final lock. Inputs go through the game's InputManager callbacks.
+    """
+    inputs = game.inputs
+    for n, placement in enumerate(replay.placements):
+        if game.game_over or game.cur.kind != placement.kind:
+            raise ValueError(f"replay diverged at piece {n}")
+        yield n
+        for move in placement.moves:
+            if move[0] == "move":
+                inputs.on_move(move[1], move[2])
+            else:
+                inputs.on_rotate(move[1])
+            yield n
+        if (game.cur.x, game.cur.rot) != (placement.x, placement.rot):
+            raise ValueError(f"replay diverged at piece {n}")
+        inputs.on_hard_drop()
+    yield len(replay.placements)
+
+
+def frame_count(replay: Replay) -> int:
+    """Number of values `steps` yields for this replay."""
+    return sum(1 + len(p.moves) for p in replay.placements) + 1
@@ -0,0 +1,241 @@
+"""
+Live game state in a named `multiprocessing.shared_memory` block, for dashboards,
+recorders and analysis bots running as separate processes.
+
+Layout (little endian, offsets in bytes):
+    0   8s  magic b"TTRSSHM1"
+    8   Q   sequence: odd while the publisher is writing, bumped twice per update
+    16  H   cols
+    18  H   rows
+    20  Q   score
+    28  I   level
+    32  I   lines
+    36  b   current piece kind (index into KINDS, -1 for none)
+    37  h   piece x
+    39  h   piece y
+    41  B   piece rotation
+    42  B   flags: 1 paused, 2 game over
+    43  Q   updates published so far
+    51  rows * cols bytes, row-major from the top: 0 empty, 1 + KINDS index for a piece
+        colour, 8 for anything else
+
+Readers use the sequence number as a seqlock: read it, copy what they need, read it
+again, and retry if it was odd or changed. The publisher never waits for anyone, so
+observers can come and go without touching the game loop.
+
+Usage: python tetris.py --shm tetris        (the game publishes to "tetris")
+       python -m src.shm_export watch tetris
+"""
+from __future__ import annotations
+import argparse
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import List, Optional, Sequence
+
+from .bag import KINDS
+from .board import Board
+from .config import COLORS
+from .piece import Piece
+
+MAGIC = b"TTRSSHM1"
+_HEADER = struct.Struct("<8sQHHQIIbhhBBQ")
+_SEQ = struct.Struct("<Q")
+_SEQ_OFFSET = 8
+_STATE = struct.Struct("<QIIbhhBBQ")
+_STATE_OFFSET = 20
+PAUSED, GAME_OVER = 1, 2
+OTHER = 8
+_CODES = {COLORS[k]: i + 1 for i, k in enumerate(KINDS)}
+
+
+def block_size(cols: int, rows: int) -> int:
+    return _HEADER.size + cols * rows
+
+
+@dataclass
+class Snapshot:
+    """One consistent copy of the published state."""
+
+    cols: int
+    rows: int
+    score: int
+    level: int
+    lines: int
+    piece: Optional[Piece]
+    paused: bool
+    game_over: bool
+    updates: int
+    cells: bytes  # rows * cols codes, see the module docstring
+
+    def row(self, y: int) -> bytes:
+        return self.cells[y * self.cols:(y + 1) * self.cols]
+
+
+class Publisher:
+    """
+    Writes states into a block under the seqlock. Creates (and on close, unlinks) the
+    block unless `create` is False, in which case it takes over one made elsewhere -
+    e.g. by a batch runner's parent for each of its workers.
+    """
+
+    def __init__(self, name: str, cols: int, rows: int, create: bool = True):
+        self.cols, self.rows = cols, rows
+        self.owner = create
+        if create:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=block_size(cols, rows))
+        else:
+            # The creator is our parent and shares our resource tracker: stay registered
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self._buf = self.shm.buf
+        self._seq = 0
+        self._updates = 0
+        self._cells = bytearray(cols * rows)
+        self._board_version = None
+        self._board_id = None
+        _HEADER.pack_into(self._buf, 0, MAGIC, 0, cols, rows, 0, 0, 0, -1, 0, 0, 0, 0, 0)
+
+    def _encode(self, board: Board):
+        cells, cols = self._cells, self.cols
+        cells[:] = bytes(len(cells))
+        for y in board.occupied_rows():
+            base = y * cols
+            for x, color in board.row_cells(y):
+                cells[base + x] = _CODES.get(color, OTHER)
+
+    def publish(
+        self,
+        board: Board,
+        piece: Optional[Piece],
+        score: int,
+        level: int,
+        lines: int,
+        paused: bool = False,
+        game_over: bool = False,
+    ):
+        # Re-encode the cells only when the board changed; most updates just move the piece
+        board_changed = (id(board), board.version) != (self._board_id, self._board_version)
+        if board_changed:
+            self._encode(board)
+            self._board_id, self._board_version = id(board), board.version
+        self._updates += 1
+        flags = (PAUSED if paused else 0) | (GAME_OVER if game_over else 0)
+        kind = KINDS.index(piece.kind) if piece is not None else -1
+        x, y, rot = (piece.x, piece.y, piece.rot) if piece is not None else (0, 0, 0)
+        buf = self._buf
+        self._seq += 1
+        _SEQ.pack_into(buf, _SEQ_OFFSET, self._seq)
+        _STATE.pack_into(buf, _STATE_OFFSET, score, level, lines, kind, x, y, rot, flags, self._updates)
+        if board_changed:
+            buf[_HEADER.size:_HEADER.size + len(self._cells)] = self._cells
+        self._seq += 1
+        _SEQ.pack_into(buf, _SEQ_OFFSET, self._seq)
+
+    def publish_game(self, game):
+        """Publish a Tetris instance's visible state."""
+        self.publish(game.board, None if game.game_over else game.cur, game.score, game.level,
+                     game.lines, game.paused, game.game_over)
+
+    def close(self):
+        self._buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach without taking over the block's lifetime (the publisher unlinks it)."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Before 3.13 attaching registers the block with the resource tracker, which would
+    # unlink it - under the running game - when the observer exits. Unregistering
+    # afterwards isn't safe either: a tracker shared with the publisher (a child process,
+    # or the same one) would then forget the publisher's own registration.
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class Observer:
+    """Read-only attachment to a published block. `buf` is the raw zero-copy view."""
+
+    def __init__(self, name: str):
+        self.shm = _attach(name)
+        self.buf = self.shm.buf
+        magic, _, self.cols, self.rows, *_ = _HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"shared memory block {name!r} is not a published game")
+
+    def sequence(self) -> int:
+        return _SEQ.unpack_from(self.buf, _SEQ_OFFSET)[0]
+
+    def read(self, retries: int = 1000) -> Snapshot:
+        """A consistent snapshot; retries while the publisher is mid-write."""
+        buf = self.buf
+        for _ in range(retries):
+            before = self.sequence()
+            if before & 1:
+                time.sleep(0)
+                continue
+            state = _STATE.unpack_from(buf, _STATE_OFFSET)
+            cells = bytes(buf[_HEADER.size:_HEADER.size + self.cols * self.rows])
+            if self.sequence() == before:
+                break
+        else:
+            raise TimeoutError("publisher kept the block busy")
+        score, level, lines, kind, x, y, rot, flags, updates = state
+        piece = Piece(KINDS[kind], x, y, rot, COLORS[KINDS[kind]]) if kind >= 0 else None
+        return Snapshot(self.cols, self.rows, score, level, lines, piece,
+                        bool(flags & PAUSED), bool(flags & GAME_OVER), updates, cells)
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+
+
+def render_text(snap: Snapshot) -> List[str]:
+    piece_cells = set(snap.piece.blocks()) if snap.piece is not None else set()
+    lines = [f"score {snap.score}  level {snap.level}  lines {snap.lines}  update {snap.updates}"
+             + ("  PAUSED" if snap.paused else "") + ("  GAME OVER" if snap.game_over else "")]
+    for y in range(snap.rows):
+        row = snap.row(y)
+        lines.append("|" + "".join(
+            "@" if (x, y) in piece_cells else ("#" if row[x] else ".") for x in range(snap.cols)
+        ) + "|")
+    return lines
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.shm_export", description="Observe a published game")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    w = sub.add_parser("watch", help="print the board whenever it changes")
+    w.add_argument("name")
+    w.add_argument("--interval", type=float, default=0.1, help="seconds between polls")
+    args = parser.parse_args(argv)
+    if args.cmd == "watch":
+        observer = Observer(args.name)
+        last = None
+        try:
+            while True:
+                seq = observer.sequence()
+                if seq != last:
+                    last = seq
+                    print("\n".join(render_text(observer.read())), flush=True)
+                time.sleep(args.interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            observer.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,256 @@
+"""
+Soak test. Runs the real game loop (`Tetris.tick`, fed with posted key events) headless
+for as long as asked, playing random placements so games top out quickly, and restarts
+each finished game with the R key just as a player would. Along the way it also pauses,
+toggles the hint and takes moves back, so every long-lived path gets exercised.
+
+--seed fixes the whole run: the random play, the first game's pieces, and through
+`Tetris.restart` every later game's seed, which each sample records for the game then
+in progress.
+
+Every --interval seconds it samples RSS, tracemalloc's traced size, the number of live
+pygame Surfaces and Sounds, and the allocation sites that grew most since the previous
+sample. At the end the growth of each series per game cycle is fitted by least squares
+(ignoring --warmup cycles) and the run fails if memory or object counts keep climbing.
+
+Outputs (in --out):
+    samples.jsonl   one sample per line
+    summary.json    slopes, limits and verdict
+
+Usage: python tetris.py --soak --duration 14400 --interval 60
+"""
+from __future__ import annotations
+import argparse
+import gc
+import json
+import os
+import random
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from .cli import use_dummy_drivers
+from .movegen import placements
+
+_MOVE_KEYS = {-1: "K_LEFT", 1: "K_RIGHT"}
+_ROTATE_KEYS = {-1: "K_UP", 1: "K_z"}
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size, where /proc is available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def count_live(types: Dict[str, type]) -> Dict[str, int]:
+    """
+    Live instances of each type. pygame's C objects aren't tracked by the GC, so they
+    are found as referents of tracked objects - looking one level into containers, since
+    CPython stops tracking a dict or tuple that only holds untracked values.
+    """
+    found: Dict[str, set] = {name: set() for name in types}
+
+    def check(ref):
+        for name, cls in types.items():
+            if isinstance(ref, cls):
+                found[name].add(id(ref))
+
+    for obj in gc.get_objects():
+        for ref in gc.get_referents(obj):
+            check(ref)
+            if isinstance(ref, (dict, list, tuple)) and not gc.is_tracked(ref):
+                for inner in gc.get_referents(ref):
+                    check(inner)
+    return {name: len(ids) for name, ids in found.items()}
+
+
+def slope(xs: Sequence[float], ys: Sequence[float]) -> float:
+    """Least-squares slope of ys over xs (0 with fewer than two distinct xs)."""
+    n = len(xs)
+    if n < 2:
+        return 0.0
+    mx, my = sum(xs) / n, sum(ys) / n
+    sxx = sum((x - mx) ** 2 for x in xs)
+    if sxx == 0:
+        return 0.0
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / sxx
+
+
+class Soak:
+    def __init__(self, game, rng: random.Random, trace: bool = True, top: int = 10):
+        import pygame
+
+        self.pygame = pygame
+        self.game = game
+        self.rng = rng
+        self.trace = trace
+        self.top = top
+        self.cycles = 0
+        self.pieces = 0
+        self.samples: List[dict] = []
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._start = time.monotonic()
+
+    def _press(self, key: str):
+        pygame = self.pygame
+        code = getattr(pygame, key)
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=code, mod=0))
+        pygame.event.post(pygame.event.Event(pygame.KEYUP, key=code, mod=0))
+
+    def _pump(self):
+        self.game.tick(self.pygame.event.get(), limit_fps=False)
+
+    def play_piece(self):
+        """Play one random reachable placement through key events."""
+        game = self.game
+        options = placements(game.board, game.cur)
+        if not options:
+            self._press("K_SPACE")
+            self._pump()
+            return
+        placement = self.rng.choice(options)
+        for move in placement.moves:
+            if move[0] == "rotate":
+                self._press(_ROTATE_KEYS[move[1]])
+            elif move[1]:
+                self._press(_MOVE_KEYS[move[1]])
+            else:
+                for _ in range(move[2]):
+                    self._press("K_DOWN")
+        self._press("K_SPACE")
+        self._pump()
+        self.pieces += 1
+        # The rarer paths: pause, the perfect-clear hint, rewind
+        roll = self.rng.random()
+        if roll < 0.02:
+            self._press("K_p")
+            self._pump()
+            self._press("K_p")
+        elif roll < 0.04:
+            self._press("K_h")
+        elif roll < 0.08:
+            self._press("K_BACKSPACE")
+        self._pump()
+
+    def play_cycle(self):
+        """One game from start to top-out, then restart it with R."""
+        while not self.game.game_over:
+            self.play_piece()
+        self._press("K_r")
+        self._pump()
+        self.cycles += 1
+
+    def sample(self) -> dict:
+        gc.collect()
+        pygame = self.pygame
+        row = {
+            "t": round(time.monotonic() - self._start, 3),
+            "cycles": self.cycles,
+            "pieces": self.pieces,
+            "seed": self.game.seed,  # the game in progress; each restart derives the next from it
+            "rss": rss_bytes(),
+            **count_live({"surfaces": pygame.Surface, "sounds": pygame.mixer.Sound}),
+        }
+        if self.trace:
+            current, peak = tracemalloc.get_traced_memory()
+            row["traced"], row["traced_peak"] = current, peak
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            ])
+            if self._snapshot is not None:
+                row["growth"] = [
+                    {"site": str(stat.traceback), "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+                    for stat in snapshot.compare_to(self._snapshot, "lineno")[:self.top]
+                    if stat.size_diff > 0
+                ]
+            self._snapshot = snapshot
+        self.samples.append(row)
+        return row
+
+
+def verdict(samples: Sequence[dict], warmup: int, limits: Dict[str, float]) -> dict:
+    """Per-cycle growth of each series after warmup, and whether it stayed within `limits`."""
+    steady = [s for s in samples if s["cycles"] >= warmup]
+    xs = [s["cycles"] for s in steady]
+    report = {"warmup_cycles": warmup, "samples_used": len(steady), "slopes": {}, "limits": limits, "failed": []}
+    for key, limit in limits.items():
+        points = [(x, s[key]) for x, s in zip(xs, steady) if s.get(key) is not None]
+        if len(points) < 2:
+            continue
+        value = slope([p[0] for p in points], [p[1] for p in points])
+        report["slopes"][key] = value
+        if value > limit:
+            report["failed"].append(key)
+    report["ok"] = not report["failed"]
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="tetris.py --soak", description="Headless long-running leak check")
+    parser.add_argument("--duration", type=float, default=3600, help="seconds to run")
+    parser.add_argument("--interval", type=float, default=60, help="seconds between samples")
+    parser.add_argument("--warmup", type=int, default=5, help="game cycles left out of the slope fit")
+    parser.add_argument("--max-slope-kb", type=float, default=16.0,
+                        help="allowed growth of RSS and traced memory, KB per game cycle")
+    parser.add_argument("--max-object-slope", type=float, default=0.05,
+                        help="allowed growth of live Surfaces/Sounds per game cycle")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="skip tracemalloc (faster, RSS only)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cols", type=int, default=None)
+    parser.add_argument("--rows", type=int, default=None)
+    parser.add_argument("--out", default="soak_out", help="output directory")
+    args = parser.parse_args(argv)
+
+    use_dummy_drivers()
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    trace = not args.no_tracemalloc
+    if trace:
+        tracemalloc.start()
+    from .game import Tetris
+
+    game = Tetris(args.cols, args.rows, seed=args.seed)
+    game.sounds.mute()
+    soak = Soak(game, random.Random(args.seed), trace)
+
+    end = time.monotonic() + args.duration
+    next_sample = time.monotonic()
+    with open(out / "samples.jsonl", "w") as f:
+        while True:
+            now = time.monotonic()
+            if now >= next_sample or now >= end:
+                row = soak.sample()
+                f.write(json.dumps(row) + "\n")
+                f.flush()
+                rss = row["rss"] / 2**20 if row["rss"] is not None else float("nan")
+                traced = f", traced {row['traced'] / 2**20:.1f} MB" if trace else ""
+                print(f"{row['t']:>9.0f}s  cycle {soak.cycles:>6}  rss {rss:.1f} MB{traced}, "
+                      f"{row['surfaces']} surfaces, {row['sounds']} sounds", flush=True)
+                next_sample = now + args.interval
+                if now >= end:
+                    break
+            soak.play_cycle()
+
+    kb = args.max_slope_kb * 1024
+    limits = {"rss": kb, "surfaces": args.max_object_slope, "sounds": args.max_object_slope}
+    if trace:
+        limits["traced"] = kb
+    report = verdict(soak.samples, args.warmup, limits)
+    report.update({"cycles": soak.cycles, "pieces": soak.pieces, "duration_s": args.duration})
+    with open(out / "summary.json", "w") as f:
+        json.dump(report, f, indent=2)
+    for key, value in report["slopes"].items():
+        unit = "KB/cycle" if key in ("rss", "traced") else "/cycle"
+        shown = value / 1024 if unit == "KB/cycle" else value
+        print(f"  {key:<9} {shown:+.3f} {unit}{'  FAIL' if key in report['failed'] else ''}")
+    print(f"{soak.cycles} cycles, {soak.pieces} pieces: {'ok' if report['ok'] else 'FAILED'}")
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
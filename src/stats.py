@@ -0,0 +1,265 @@
+"""
+Constant-memory game statistics. Metrics arrive as a stream and are folded into
+summaries that never hold raw records:
+
+    counters    plain integer counts
+    running     count / mean / variance / min / max (Welford; merged with Chan et al.)
+    sketches    relative-error quantiles: values fall into log-spaced buckets, so any
+                quantile is within `accuracy` of the true value and two sketches merge
+                by adding bucket counts
+    histograms  counts per discrete value (line clears by SCORES category, stack height)
+
+Merging is exact: summaries built by parallel workers combine into the same result as
+one aggregator fed every record. Snapshots are written atomically as JSON.
+
+Usage: python -m src.stats --seeds 0:10000 --pieces 500 --out stats.json --every 30
+"""
+from __future__ import annotations
+import argparse
+import json
+import math
+import os
+import time
+from collections import Counter
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+from .cli import seed_range
+from .config import CONFIG
+
+
+class RunningStats:
+    """Mean and variance without storing values (Welford's update)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "RunningStats"):
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count, "mean": self.mean, "m2": self.m2,
+            "min": self.min if self.count else None, "max": self.max if self.count else None,
+            "stdev": math.sqrt(self.variance),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RunningStats":
+        stats = cls()
+        stats.count, stats.mean, stats.m2 = data["count"], data["mean"], data["m2"]
+        if stats.count:
+            stats.min, stats.max = data["min"], data["max"]
+        return stats
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch for non-negative values. A value v > `min_value` lands
+    in bucket ceil(log_gamma(v)) with gamma = (1 + accuracy) / (1 - accuracy), so every
+    bucket's midpoint is within `accuracy` (relative) of anything in it; smaller values
+    are counted as zero. The bucket count grows with log(max / min_value), not with n.
+    """
+
+    def __init__(self, accuracy: float = 0.01, min_value: float = 1e-9):
+        self.accuracy = accuracy
+        self.min_value = min_value
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.zeros = 0
+        self.buckets: Counter = Counter()
+
+    @property
+    def count(self) -> int:
+        return self.zeros + sum(self.buckets.values())
+
+    def add(self, value: float, count: int = 1):
+        if value < 0:
+            raise ValueError("QuantileSketch only takes non-negative values")
+        if value <= self.min_value:
+            self.zeros += count
+        else:
+            self.buckets[math.ceil(math.log(value) / self._log_gamma)] += count
+
+    def merge(self, other: "QuantileSketch"):
+        if other.gamma != self.gamma or other.min_value != self.min_value:
+            raise ValueError("cannot merge sketches with different accuracy")
+        self.zeros += other.zeros
+        self.buckets.update(other.buckets)
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_dict(self) -> dict:
+        return {
+            "accuracy": self.accuracy, "min_value": self.min_value, "zeros": self.zeros,
+            "buckets": {str(k): v for k, v in sorted(self.buckets.items())},
+            "quantiles": {f"p{round(q * 100, 1):g}": self.quantile(q) for q in (0.5, 0.9, 0.99, 0.999)},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileSketch":
+        sketch = cls(data["accuracy"], data["min_value"])
+        sketch.zeros = data["zeros"]
+        sketch.buckets = Counter({int(k): v for k, v in data["buckets"].items()})
+        return sketch
+
+
+class Aggregator:
+    """Named counters, running stats, quantile sketches and histograms; mergeable."""
+
+    def __init__(self, accuracy: float = 0.01):
+        self.accuracy = accuracy
+        self.counters: Counter = Counter()
+        self.running: Dict[str, RunningStats] = {}
+        self.sketches: Dict[str, QuantileSketch] = {}
+        self.histograms: Dict[str, Counter] = {}
+        self._last_snapshot = time.monotonic()
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] += n
+
+    def observe(self, name: str, value: float):
+        """Add a sample to both the running stats and the quantile sketch of `name`."""
+        if name not in self.running:
+            self.running[name] = RunningStats()
+            self.sketches[name] = QuantileSketch(self.accuracy)
+        self.running[name].add(value)
+        self.sketches[name].add(value)
+
+    def tally(self, name: str, key, n: int = 1):
+        """Histogram `name` counts one more `key` (stored as a string, as in JSON)."""
+        self.histograms.setdefault(name, Counter())[str(key)] += n
+
+    def merge(self, other: "Aggregator"):
+        self.counters.update(other.counters)
+        for name, stats in other.running.items():
+            if name not in self.running:
+                self.running[name] = RunningStats()
+                self.sketches[name] = QuantileSketch(other.sketches[name].accuracy, other.sketches[name].min_value)
+            self.running[name].merge(stats)
+            self.sketches[name].merge(other.sketches[name])
+        for name, hist in other.histograms.items():
+            self.histograms.setdefault(name, Counter()).update(hist)
+
+    def to_dict(self) -> dict:
+        return {
+            "accuracy": self.accuracy,
+            "counters": dict(self.counters),
+            "running": {name: s.to_dict() for name, s in self.running.items()},
+            "sketches": {name: s.to_dict() for name, s in self.sketches.items()},
+            "histograms": {name: dict(sorted(h.items(), key=_hist_order)) for name, h in self.histograms.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Aggregator":
+        agg = cls(data["accuracy"])
+        agg.counters = Counter(data["counters"])
+        agg.running = {name: RunningStats.from_dict(d) for name, d in data["running"].items()}
+        agg.sketches = {name: QuantileSketch.from_dict(d) for name, d in data["sketches"].items()}
+        agg.histograms = {name: Counter(h) for name, h in data["histograms"].items()}
+        return agg
+
+    def snapshot(self, path: str | Path):
+        """Write the summary as JSON; readers never see a half-written file."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_dict(), f, indent=1)
+        os.replace(tmp, path)
+        self._last_snapshot = time.monotonic()
+
+    def maybe_snapshot(self, path: Optional[str | Path], every_s: float) -> bool:
+        if path is None or time.monotonic() - self._last_snapshot < every_s:
+            return False
+        self.snapshot(path)
+        return True
+
+
+def _hist_order(item):
+    key = item[0]
+    return (0, int(key), "") if key.lstrip("-").isdigit() else (1, 0, key)
+
+
+# ----------------------------- simulation runs -----------------------------
+def _run_chunk(args) -> dict:
+    from .tournament import play, worker_policy
+
+    spec, seeds, pieces, cols, rows, accuracy = args
+    policy = worker_policy(spec)
+    agg = Aggregator(accuracy)
+    for seed in seeds:
+        play(policy, seed, pieces, cols, rows, stats=agg)
+    return agg.to_dict()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.stats", description="Aggregate statistics over seeded bot games")
+    parser.add_argument("--policy", default="default", help="policy spec, as for src.tournament")
+    parser.add_argument("--seeds", type=seed_range, default=range(0, 1000), help="e.g. 0:10000")
+    parser.add_argument("--pieces", type=int, default=500, help="piece cap per game")
+    parser.add_argument("--cols", type=int, default=CONFIG["COLS"])
+    parser.add_argument("--rows", type=int, default=CONFIG["ROWS"])
+    parser.add_argument("--chunk", type=int, default=50, help="games per work item")
+    parser.add_argument("--accuracy", type=float, default=0.01, help="relative error of the quantiles")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--every", type=float, default=30.0, help="seconds between snapshots")
+    parser.add_argument("--out", default="stats.json")
+    args = parser.parse_args(argv)
+
+    seeds = list(args.seeds)
+    tasks = [
+        (args.policy, seeds[i:i + args.chunk], args.pieces, args.cols, args.rows, args.accuracy)
+        for i in range(0, len(seeds), args.chunk)
+    ]
+    total = Aggregator(args.accuracy)
+    with Pool(args.processes) as pool:
+        for part in pool.imap_unordered(_run_chunk, tasks):
+            total.merge(Aggregator.from_dict(part))
+            total.maybe_snapshot(args.out, args.every)
+    total.snapshot(args.out)
+    games = total.counters["games"]
+    pieces = total.running.get("keys_per_piece", RunningStats()).count
+    print(f"{games} games, {pieces} pieces -> {args.out}")
+    if "lut_hits" in total.counters and pieces:
+        print(f"placement table answered {total.counters['lut_hits'] / pieces:.1%} of decisions")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,410 @@
+"""
+Bot tournament. Every policy plays the same seeded games - identical SevenBag piece
+sequences - so any two policies can be compared game by game, and each (policy, seed)
+game is played exactly once no matter how many opponents it is compared against. Games
+run on a process pool that hands out one game at a time, so a worker that finishes
+early simply takes the next one. Every result is appended to a JSONL checkpoint as it
+arrives, with the full policy spec and game parameters; rerunning with the same
+checkpoint skips the games already in it that were played with the same spec, piece cap
+and board size, and anything else is played again.
+
+Ratings are Bradley-Terry strengths fitted to the pairwise wins (higher score wins a
+seed, then more lines; equal results count half each), on the Elo scale, with
+percentile confidence intervals from resampling seeds.
+
+Policies:
+    default                         the heuristic bot with its default weights
+    NAME=weights:H,L,HOLES,BUMP     the heuristic bot with these evaluation weights
+    NAME=lut:PATH                   the heuristic bot answering from a placement table
+                                    (`python -m src.lut build`), searching what it lacks
+    NAME=package.module:function    any callable (board, piece) -> Placement | None
+
+Usage: python -m src.tournament --policy default --policy flat=weights:-0.4,0.8,-0.4,-0.1 \\
+           --seeds 0:10000 --checkpoint runs/flat.jsonl
+"""
+from __future__ import annotations
+import argparse
+import importlib
+import json
+import math
+import os
+import random
+import time
+from collections import Counter
+from multiprocessing import Pool, Value
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .bag import SevenBag
+from .board import Board
+from .bot import Bot, Weights
+from .cli import seed_range
+from .config import COLORS, CONFIG, SCORES
+from .movegen import Placement, spawn
+from .piece import Piece
+
+if TYPE_CHECKING:
+    from .shm_export import Publisher
+    from .stats import Aggregator
+
+Policy = Callable[[Board, Piece], Optional[Placement]]
+
+
+def policy_name(spec: str) -> str:
+    return spec if spec == "default" else spec.partition("=")[0]
+
+
+def load_policy(spec: str) -> Tuple[str, Policy]:
+    """Parse a policy spec (see the module docstring) into (name, callable)."""
+    if spec == "default":
+        return "default", Bot().choose
+    name, sep, target = spec.partition("=")
+    if not sep or not name:
+        raise ValueError(f"bad policy {spec!r}: expected NAME=weights:... or NAME=module:function")
+    prefix, _, rest = target.partition(":")
+    if prefix == "weights":
+        values = [float(v) for v in rest.split(",")]
+        if len(values) != 4:
+            raise ValueError(f"bad policy {spec!r}: weights takes height,lines,holes,bumpiness")
+        return name, Bot(Weights(*values)).choose
+    if prefix == "lut":
+        from .lut import PlacementTable
+
+        # mmap'd read-only: every worker loading the same file shares its pages
+        table = PlacementTable(rest)
+        return name, Bot(table.weights, table).choose
+    module, _, attr = target.partition(":")
+    if not attr:
+        raise ValueError(f"bad policy {spec!r}: expected module:function")
+    return name, getattr(importlib.import_module(module), attr)
+
+
+_policies: Dict[str, Policy] = {}
+
+
+def worker_policy(spec: str) -> Policy:
+    """load_policy, once per process: pool workers keep tables and imports between tasks."""
+    if spec not in _policies:
+        _policies[spec] = load_policy(spec)[1]
+    return _policies[spec]
+
+
+def play(
+    policy: Policy,
+    seed: int,
+    pieces: int,
+    cols: int,
+    rows: int,
+    stats: Optional["Aggregator"] = None,
+    publisher: Optional["Publisher"] = None,
+) -> Dict[str, int]:
+    """
+    One headless game with the same gravity-free rules and scoring as Tetris. With
+    `stats`, per-piece and per-game metrics are streamed into that aggregator; with
+    `publisher`, the state is published to shared memory at every spawn. For a Bot
+    with a placement table the result also counts the decisions the table answered.
+    """
+    bot = getattr(policy, "__self__", None)
+    table_bot = bot if isinstance(bot, Bot) and bot.table is not None else None
+    lookups_before = table_bot.lookups if table_bot is not None else 0
+    board, bag = Board(cols, rows), SevenBag(seed)
+    score = lines = placed = 0
+    topped_out = False
+    start = time.perf_counter()
+    for _ in range(pieces):
+        kind = bag.next()
+        piece = spawn(kind, cols, COLORS[kind])
+        if not board.valid(piece):
+            topped_out = True
+            break
+        if publisher is not None:
+            publisher.publish(board, piece, score, lines // 10, lines)
+        placement = policy(board, piece)
+        if placement is None:
+            topped_out = True
+            break
+        locked = placement.piece(COLORS[kind])
+        if placement.kind != kind or not board.valid(locked) or board.drop_distance(locked):
+            raise ValueError(f"policy returned an illegal placement {placement} on seed {seed}")
+        cleared = board.lock(locked)
+        placed += 1
+        if cleared:
+            score += SCORES.get(cleared, 0) * (lines // 10 + 1)
+            lines += cleared
+        if stats is not None:
+            stats.observe("keys_per_piece", len(placement.moves) + 1)  # + the hard drop
+            stats.observe("stack_height", board.stack_height)
+            stats.tally("stack_height", board.stack_height)
+            stats.tally("line_clears", cleared)
+    if publisher is not None:
+        publisher.publish(board, None, score, lines // 10, lines, game_over=topped_out)
+    if stats is not None:
+        elapsed = time.perf_counter() - start
+        stats.count("games")
+        stats.count("pieces", placed)
+        stats.count("lines", lines)
+        stats.observe("score", score)
+        if elapsed > 0:
+            stats.observe("pieces_per_second", placed / elapsed)
+        if topped_out:
+            stats.count("topouts")
+            stats.observe("topout_pieces", placed)
+            stats.observe("topout_seconds", elapsed)
+    result = {"score": score, "lines": lines, "pieces": placed}
+    if table_bot is not None:
+        result["lut_hits"] = table_bot.lookups - lookups_before
+        if stats is not None:
+            stats.count("lut_hits", result["lut_hits"])
+    return result
+
+
+# ----------------------------- scheduling ----------------------------------
+_publisher: Optional["Publisher"] = None
+
+
+def _init_worker(shm_prefix: Optional[str], counter, cols: int, rows: int):
+    """Give each worker one of the blocks the parent created (`--shm`)."""
+    global _publisher
+    if shm_prefix is None:
+        return
+    from .shm_export import Publisher
+
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    _publisher = Publisher(f"{shm_prefix}.{index}", cols, rows, create=False)
+
+
+def _play_task(args) -> dict:
+    spec, seed, pieces, cols, rows = args
+    result = play(worker_policy(spec), seed, pieces, cols, rows, publisher=_publisher)
+    return {"policy": policy_name(spec), "spec": spec, "seed": seed,
+            "pieces_cap": pieces, "cols": cols, "rows": rows, **result}
+
+
+def game_key(row: dict) -> Tuple[str, int, int, int, int]:
+    """What makes two checkpoint rows the same game. Rows from before specs were stored never match."""
+    return row.get("spec", ""), row["seed"], row.get("pieces_cap", -1), row.get("cols", -1), row.get("rows", -1)
+
+
+def read_checkpoint(path: Optional[str | Path]) -> List[dict]:
+    """Rows of a checkpoint. A run killed mid-write leaves a partial last line, which is ignored."""
+    if path is None or not Path(path).exists():
+        return []
+    with open(path) as f:
+        lines = [line for line in f if line.strip()]
+    rows = [json.loads(line) for line in lines[:-1]]
+    if lines:
+        try:
+            rows.append(json.loads(lines[-1]))
+        except json.JSONDecodeError:
+            pass
+    return rows
+
+
+def _end_last_line(path: str | Path):
+    """Before appending: drop a partial last line, or terminate a complete one missing its newline."""
+    with open(path, "rb+") as f:
+        data = f.read()
+        if not data or data.endswith(b"\n"):
+            return
+        start = data.rfind(b"\n") + 1
+        try:
+            json.loads(data[start:])
+        except ValueError:
+            f.truncate(start)
+        else:
+            f.write(b"\n")
+
+
+def run_games(
+    specs: Sequence[str],
+    seeds: Sequence[int],
+    pieces: int,
+    cols: int,
+    rows: int,
+    checkpoint: Optional[str | Path] = None,
+    processes: Optional[int] = None,
+    shm_prefix: Optional[str] = None,
+) -> Iterator[dict]:
+    """
+    Play every (policy, seed) game not already in `checkpoint`; yields results as they
+    finish. With `shm_prefix`, worker i publishes its current game to "<prefix>.<i>".
+    """
+    done = {game_key(r) for r in read_checkpoint(checkpoint)}
+    tasks = [
+        (spec, seed, pieces, cols, rows)
+        for seed in seeds
+        for spec in specs
+        if (spec, seed, pieces, cols, rows) not in done
+    ]
+    if not tasks:
+        return
+    processes = processes or os.cpu_count() or 1
+    blocks = []
+    if shm_prefix is not None:
+        from .shm_export import Publisher
+
+        blocks = [Publisher(f"{shm_prefix}.{i}", cols, rows) for i in range(processes)]
+    out = None
+    if checkpoint is not None:
+        if Path(checkpoint).exists():
+            _end_last_line(checkpoint)
+        out = open(checkpoint, "a")
+    try:
+        counter = Value("i", 0)
+        with Pool(processes, initializer=_init_worker, initargs=(shm_prefix, counter, cols, rows)) as pool:
+            for result in pool.imap_unordered(_play_task, tasks, chunksize=1):
+                if out is not None:
+                    out.write(json.dumps(result) + "\n")
+                    out.flush()
+                yield result
+    finally:
+        if out is not None:
+            out.close()
+        for block in blocks:
+            block.close()
+
+
+# ----------------------------- ratings -------------------------------------
+def pairwise(results: Sequence[dict], names: Sequence[str]) -> Dict[int, List[List[float]]]:
+    """Per seed, wins[i][j]: 1 if policy i beat j on that seed, 0.5 for a tie, else 0."""
+    by_seed: Dict[int, Dict[str, dict]] = {}
+    for r in results:
+        by_seed.setdefault(r["seed"], {})[r["policy"]] = r
+    n = len(names)
+    out = {}
+    for seed, games in by_seed.items():
+        if not all(name in games for name in names):
+            continue
+        keys = [(games[name]["score"], games[name]["lines"]) for name in names]
+        wins = [[0.0] * n for _ in range(n)]
+        for i in range(n):
+            for j in range(i + 1, n):
+                if keys[i] != keys[j]:
+                    wins[i][j] = float(keys[i] > keys[j])
+                    wins[j][i] = 1.0 - wins[i][j]
+                else:
+                    wins[i][j] = wins[j][i] = 0.5
+        out[seed] = wins
+    return out
+
+
+def bradley_terry(wins: Sequence[Sequence[float]], prior: float = 0.5, iterations: int = 1000) -> List[float]:
+    """
+    Elo-scale ratings (mean 0) from a win matrix, by the MM iteration. `prior` adds that
+    many virtual wins each way between every pair so unbeaten policies stay finite.
+    """
+    n = len(wins)
+    w = [[wins[i][j] + prior if i != j else 0.0 for j in range(n)] for i in range(n)]
+    total_wins = [sum(row) for row in w]
+    strength = [1.0] * n
+    for _ in range(iterations):
+        new = []
+        for i in range(n):
+            denom = sum((w[i][j] + w[j][i]) / (strength[i] + strength[j]) for j in range(n) if j != i)
+            new.append(total_wins[i] / denom if denom else strength[i])
+        scale = math.exp(sum(math.log(s) for s in new) / n)
+        new = [s / scale for s in new]
+        converged = max(abs(a - b) for a, b in zip(new, strength)) < 1e-10
+        strength = new
+        if converged:
+            break
+    return [400 * math.log10(s) for s in strength]
+
+
+def _total(per_seed: Dict[int, List[List[float]]], counts: Dict[int, int], n: int) -> List[List[float]]:
+    total = [[0.0] * n for _ in range(n)]
+    for seed, k in counts.items():
+        wins = per_seed[seed]
+        for i in range(n):
+            row, out = wins[i], total[i]
+            for j in range(n):
+                out[j] += k * row[j]
+    return total
+
+
+def ratings(
+    results: Sequence[dict],
+    names: Sequence[str],
+    bootstrap: int = 200,
+    confidence: float = 0.95,
+    rng_seed: int = 0,
+) -> List[dict]:
+    """Rating, confidence interval and score summary per policy, best first."""
+    per_seed = pairwise(results, names)
+    seeds = sorted(per_seed)
+    n = len(names)
+    point = bradley_terry(_total(per_seed, {s: 1 for s in seeds}, n))
+    rng = random.Random(rng_seed)
+    samples: List[List[float]] = [[] for _ in range(n)]
+    for _ in range(bootstrap if seeds else 0):
+        counts = Counter(rng.choices(seeds, k=len(seeds)))
+        for i, r in enumerate(bradley_terry(_total(per_seed, counts, n))):
+            samples[i].append(r)
+    tail = (1 - confidence) / 2
+    table = []
+    for i, name in enumerate(names):
+        scores = [r["score"] for r in results if r["policy"] == name and r["seed"] in per_seed]
+        ordered = sorted(samples[i])
+        low = ordered[int(tail * (len(ordered) - 1))] if ordered else float("nan")
+        high = ordered[int((1 - tail) * (len(ordered) - 1))] if ordered else float("nan")
+        table.append({
+            "policy": name,
+            "rating": point[i],
+            "low": low,
+            "high": high,
+            "games": len(scores),
+            "mean_score": sum(scores) / len(scores) if scores else 0.0,
+        })
+    table.sort(key=lambda row: -row["rating"])
+    return table
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.tournament", description="Rate bot policies on shared seeds")
+    parser.add_argument("--policy", action="append", required=True, help="policy spec; repeat for each entrant")
+    parser.add_argument("--seeds", type=seed_range, default=range(0, 1000), help="e.g. 0:10000")
+    parser.add_argument("--pieces", type=int, default=500, help="piece cap per game")
+    parser.add_argument("--cols", type=int, default=CONFIG["COLS"])
+    parser.add_argument("--rows", type=int, default=CONFIG["ROWS"])
+    parser.add_argument("--checkpoint", default=None, help="JSONL file results are appended to and resumed from")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--shm", metavar="PREFIX", default=None,
+                        help="publish each worker's game to shared memory as PREFIX.0, PREFIX.1, ...")
+    parser.add_argument("--bootstrap", type=int, default=200, help="resamples for the confidence intervals")
+    parser.add_argument("--out", default=None, help="write the ratings table as JSON")
+    args = parser.parse_args(argv)
+
+    names = [load_policy(spec)[0] for spec in args.policy]  # fail fast on bad specs
+    if len(set(names)) != len(names):
+        parser.error("policy names must be unique")
+    wanted = {(spec, seed, args.pieces, args.cols, args.rows) for spec in args.policy for seed in args.seeds}
+    results = [r for r in read_checkpoint(args.checkpoint) if game_key(r) in wanted]
+    if results:
+        print(f"resuming: {len(results)} matching games already in {args.checkpoint}")
+    games = run_games(args.policy, args.seeds, args.pieces, args.cols, args.rows, args.checkpoint,
+                      args.processes, args.shm)
+    for played, result in enumerate(games, 1):
+        results.append(result)
+        if played % 500 == 0:
+            print(f"{played} games played")
+    table = ratings(results, names, args.bootstrap)
+    print(f"{'policy':<16} {'rating':>8} {'95% CI':>19} {'games':>7} {'mean score':>11}")
+    for row in table:
+        ci = f"[{row['low']:+.1f}, {row['high']:+.1f}]"
+        print(f"{row['policy']:<16} {row['rating']:+8.1f} {ci:>19} {row['games']:>7} {row['mean_score']:>11.1f}")
+    for name in names:
+        rows = [r for r in results if r["policy"] == name and "lut_hits" in r]
+        decisions = sum(r["pieces"] for r in rows)
+        if decisions:
+            hits = sum(r["lut_hits"] for r in rows)
+            print(f"{name}: placement table answered {hits}/{decisions} decisions ({hits / decisions:.1%})")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(table, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
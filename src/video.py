@@ -0,0 +1,128 @@
+"""
+Offline replay-to-frames renderer. Each game is re-run through a real `Tetris` that
+draws into an offscreen surface (SDL dummy drivers, no window, no clock) and every step
+of the replay becomes one frame. Work is split across a process pool by game and by
+frame range; a worker fast-forwards game logic to the start of its range without
+drawing, so ranges are independent.
+
+Frames are written as PNGs, or as raw RGB chunks that concatenate into one stream:
+
+    cat clips/game_00000/chunk_*.rgb | ffmpeg -f rawvideo -pix_fmt rgb24 \\
+        -s 320x640 -r 30 -i - game_00000.mp4
+
+Usage: python -m src.video --seeds 0:100 --pieces 150 --out clips
+       python -m src.video --replays run1.json run2.json --format rgb
+"""
+from __future__ import annotations
+import argparse
+import json
+from multiprocessing import Pool
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from .cli import seed_range, use_dummy_drivers
+from .config import CONFIG
+from .replay import Replay, frame_count, record_bot_game, steps
+
+
+def _init_worker():
+    use_dummy_drivers(signal_handlers=False)
+
+
+def _record(args: Tuple[int, int]) -> Replay:
+    seed, pieces = args
+    return record_bot_game(seed, pieces)
+
+
+def frame_size(replay: Replay) -> Tuple[int, int]:
+    """Pixel size of the frames, i.e. the window Tetris would open for this board."""
+    cell = CONFIG["CELL"]
+    return replay.cols * cell, min(replay.rows, CONFIG["VIEW_ROWS"]) * cell
+
+
+def render_range(args: Tuple[Replay, str, int, int, str]) -> Tuple[str, int, int]:
+    """Render frames [start, stop) of one replay into `out_dir`."""
+    import pygame
+    from .game import Tetris
+
+    replay, out_dir, start, stop, fmt = args
+    surface = pygame.Surface(frame_size(replay))
+    game = Tetris(replay.cols, replay.rows, seed=replay.seed, screen=surface)
+    game.sounds.mute()
+    out = Path(out_dir)
+    raw = open(out / f"chunk_{start:06d}.rgb", "wb") if fmt == "rgb" else None
+    try:
+        for frame, _ in enumerate(steps(game, replay)):
+            if frame >= stop:
+                break
+            if frame < start:
+                continue
+            game.draw()
+            if raw is not None:
+                raw.write(pygame.image.tobytes(surface, "RGB"))
+            else:
+                pygame.image.save(surface, str(out / f"frame_{frame:06d}.png"))
+    finally:
+        if raw is not None:
+            raw.close()
+    return out_dir, start, min(stop, frame_count(replay))
+
+
+def render(
+    replays: Sequence[Replay],
+    out: str | Path,
+    fmt: str = "png",
+    chunk: int = 500,
+    processes: Optional[int] = None,
+) -> List[dict]:
+    """Render every replay under `out/game_NNNNN/`; returns the per-game manifests."""
+    out = Path(out)
+    tasks = []
+    manifests = []
+    for index, replay in enumerate(replays):
+        game_dir = out / f"game_{index:05d}"
+        game_dir.mkdir(parents=True, exist_ok=True)
+        total = frame_count(replay)
+        width, height = frame_size(replay)
+        manifests.append({
+            "dir": str(game_dir), "seed": replay.seed, "frames": total,
+            "width": width, "height": height, "format": fmt,
+        })
+        replay.save(game_dir / "replay.json")
+        for start in range(0, total, chunk):
+            tasks.append((replay, str(game_dir), start, min(start + chunk, total), fmt))
+    with Pool(processes, initializer=_init_worker) as pool:
+        for _ in pool.imap_unordered(render_range, tasks):
+            pass
+        pool.close()
+        pool.join()
+    for manifest in manifests:
+        with open(Path(manifest["dir"]) / "manifest.json", "w") as f:
+            json.dump(manifest, f, indent=2)
+    return manifests
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.video", description="Render games to frames offline")
+    parser.add_argument("--replays", nargs="*", default=[], help="replay JSON files to render")
+    parser.add_argument("--seeds", type=seed_range, default=None, help="seeded bot games, e.g. 0:1000")
+    parser.add_argument("--pieces", type=int, default=150, help="piece cap for seeded games")
+    parser.add_argument("--format", choices=("png", "rgb"), default="png")
+    parser.add_argument("--chunk", type=int, default=500, help="frames per work item")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--out", default="clips")
+    args = parser.parse_args(argv)
+
+    replays = [Replay.load(path) for path in args.replays]
+    if args.seeds is not None:
+        with Pool(args.processes) as pool:
+            replays += pool.map(_record, [(seed, args.pieces) for seed in args.seeds])
+    if not replays:
+        parser.error("nothing to render: pass --replays and/or --seeds")
+    manifests = render(replays, args.out, args.format, args.chunk, args.processes)
+    print(f"rendered {sum(m['frames'] for m in manifests)} frames from {len(manifests)} games into {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
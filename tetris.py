@@ -1,4 +1,36 @@
+import argparse
+import sys
+
 from src.game import Tetris
 
 if __name__ == "__main__":
-    Tetris().run()
+    parser = argparse.ArgumentParser(description="Pygame Tetris")
+    parser.add_argument("--cols", type=int, default=None, help="board width in cells")
+    parser.add_argument("--rows", type=int, default=None, help="board height in cells")
+    parser.add_argument("--bot", action="store_true", help="start with the background bot playing (A toggles it)")
+    parser.add_argument("--shm", metavar="NAME", default=None,
+                        help="publish live state to this shared memory block (see src/shm_export.py)")
+    parser.add_argument("--profile", action="store_true",
+                        help="run the deterministic headless profiling suite; see `--profile --help`")
+    parser.add_argument("--soak", action="store_true",
+                        help="run the headless leak/soak test; see `--soak --help`")
+    args, rest = parser.parse_known_args()
+    if args.profile or args.soak:
+        if args.cols is not None:
+            rest += ["--cols", str(args.cols)]
+        if args.rows is not None:
+            rest += ["--rows", str(args.rows)]
+        if args.profile:
+            from src import profiler
+            sys.exit(profiler.main(rest))
+        from src import soak
+        sys.exit(soak.main(rest))
+    if rest:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+    game = Tetris(args.cols, args.rows)
+    if args.bot:
+        game.toggle_bot()
+    if args.shm:
+        from src.shm_export import Publisher
+        game.publisher = Publisher(args.shm, game.cols, game.rows)
+    game.run()